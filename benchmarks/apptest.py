@@ -0,0 +1,161 @@
+"""
+End-to-end script-run benchmark (headless) ด้วย streamlit.testing.v1.AppTest
+
+    python -m benchmarks.apptest
+    python -m benchmarks.apptest --days 3650 --no-save
+    python -m benchmarks.apptest --storage sqlite   # อ่านจาก SQLite ในเครื่องแทน Google Sheets
+
+รัน mydashboard.py และ show() ของแต่ละหน้า โดยใช้ของปลอมแทน Google Sheets / yfinance / Gemini
+วัดเวลา script run + peak memory ของ cold run, warm run (cache อุ่นแล้ว) และหลัง interaction แต่ละแบบ
+ผลบันทึกลง benchmarks/results.jsonl เหมือน benchmarks.run (peak memory อยู่ใน peak_mib ของแต่ละ case)
+"""
+import os
+import sys
+import time
+import types
+import argparse
+import tempfile
+import tracemalloc
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import synthetic
+from benchmarks.run import install, clear_caches, current_commit, report
+
+TIMEOUT_S = 120
+
+def install_fake_gemini():
+    """
+    แทน google.generativeai ด้วย module ปลอม (ตอบกลับทันที ไม่ต่อเน็ต)
+    """
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    class GenerativeModel:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, parts):
+            return _Response("เกรด B: กระจายความเสี่ยงดีพอใช้ (fake Gemini)")
+
+    fake = types.ModuleType("google.generativeai")
+    fake.configure = lambda **kwargs: None
+    fake.GenerativeModel = GenerativeModel
+    sys.modules["google.generativeai"] = fake
+    import google
+    google.generativeai = fake
+
+def _view_script(module):
+    return f"from views import {module}\n{module}.show()\n"
+
+def measure(at, action=None):
+    """
+    รัน script หนึ่งรอบ (หลัง action ถ้ามี) คืน (ms, peak MiB ที่เพิ่มขึ้นระหว่างรอบนี้)
+    """
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    if action:
+        action(at).run(timeout=TIMEOUT_S)
+    else:
+        at.run(timeout=TIMEOUT_S)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    peak_mib = (tracemalloc.get_traced_memory()[1] - before) / 2**20
+    if at.exception:
+        raise RuntimeError(f"script raised: {at.exception[0].message}")
+    return elapsed_ms, peak_mib
+
+def _by_label(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+def _zoom_last_year(at, key):
+    # แถบเลือกช่วงของ views/zoom.py: เหลือปีล่าสุด (ช่วงสั้นพอให้เห็นทุกจุด)
+    slider = at.slider(key=f"{key}_zoom")
+    end = slider.value[1]
+    return slider.set_value((end - timedelta(days=365), end))
+
+# (ชื่อ, script, [(ชื่อ interaction, action)])
+SCENARIOS = [
+    ("mydashboard", None, [
+        ("allocation->pyramid", lambda at: at.radio[0].set_value("Pyramid")),
+    ]),
+    ("Overview", _view_script("Overview"), [
+        ("allocation->pyramid", lambda at: at.radio[0].set_value("Pyramid")),
+        ("rebalance cash slider", lambda at: _by_label(at.slider, "New cash (฿)").set_value(100_000)),
+        ("risk window", lambda at: _by_label(at.radio, "Window").set_value("3Y")),
+        ("growth chart zoom", lambda at: _zoom_last_year(at, "overview_growth")),
+    ]),
+    ("US_stocks", _view_script("US_stocks"), [
+        ("sort change", lambda at: _by_label(at.selectbox, "Sort by").set_value("Invest")),
+        ("type filter", lambda at: _by_label(at.selectbox, "Type").set_value(synthetic.STOCK_TYPES[0])),
+        ("benchmark multiselect", lambda at: _by_label(at.multiselect, "Benchmarks").set_value(["SPY"])),
+        ("risk window", lambda at: _by_label(at.radio, "Window").set_value("3M")),
+        ("history chart zoom", lambda at: _zoom_last_year(at, "us_hx")),
+    ]),
+    ("Funds", _view_script("Funds"), [
+        ("fund multiselect", lambda at: at.multiselect[0].set_value(synthetic.FUNDS[:2])),
+        ("drawdown series", lambda at: at.radio(key="fund_graph_series").set_value("Drawdown")),
+    ]),
+    ("Projection", _view_script("Projection"), [
+        ("horizon slider", lambda at: _by_label(at.slider, "Years").set_value(30)),
+        ("100k paths", lambda at: _by_label(at.select_slider, "Paths").set_value(100_000)),
+    ]),
+    ("Optimizer", _view_script("Optimizer"), [
+        ("risk-free rate", lambda at: _by_label(at.number_input, "Risk-free rate (% p.a.)").set_value(3.0)),
+    ]),
+    ("AI_analyze", _view_script("AI_analyze"), [
+        ("chat message", lambda at: at.chat_input[0].set_value("ช่วยประเมินพอร์ตหน่อย")),
+    ]),
+]
+
+def run_scenario(name, script, interactions):
+    from streamlit.testing.v1 import AppTest
+
+    if script is None:
+        at = AppTest.from_file(os.path.join(ROOT, "mydashboard.py"), default_timeout=TIMEOUT_S)
+    else:
+        at = AppTest.from_string(script, default_timeout=TIMEOUT_S)
+    at.secrets["GEMINI_API_KEY"] = "fake-key"
+
+    results = {}
+    clear_caches()
+    results[f"apptest {name} cold"] = measure(at)
+    results[f"apptest {name} warm"] = measure(at)
+    for label, action in interactions:
+        results[f"apptest {name} {label}"] = measure(at, action)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless per-page script-run benchmark with AppTest")
+    parser.add_argument("--days", type=int, default=365 * 5, help="Portfolio_Hx history length")
+    parser.add_argument("--trans", type=int, default=1_000, help="Buying track transactions")
+    parser.add_argument("--storage", choices=["gsheets", "sqlite"], default="gsheets", help="storage backend the app reads from")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    install_fake_gemini()
+    workbook = synthetic.make_workbook(n_trans=args.trans, days=args.days, tickers=("SPY", "QQQ", "VT", "THD"))
+
+    timings, memory = {}, {}
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        install(workbook, tmp)
+        if args.storage == "sqlite":
+            import storage
+            storage.DB_PATH = os.path.join(tmp, "wealth.sqlite")
+            storage.copy_tables(storage.GSheetsBackend(), storage.SQLiteBackend(storage.DB_PATH))
+            storage.BACKEND = "sqlite"
+        for name, script, interactions in SCENARIOS:
+            for case, (ms, mib) in run_scenario(name, script, interactions).items():
+                case = case if args.storage == "gsheets" else f"{case} [{args.storage}]"
+                timings[case] = [ms]
+                memory[case] = mib
+    tracemalloc.stop()
+
+    report(timings, current_commit(), save=not args.no_save, memory=memory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+ตรวจการจำลอง benchmark ของ update_portfolio_hx บน workbook สังเคราะห์
+
+    python -m benchmarks.check_replay
+
+- utils.replay_benchmark (vectorized) ได้ผลเท่ากับ loop เดิมทีละแถว / ทีละ transaction
+  transaction ถูกสลับลำดับ + มีหลายรายการในวันเดียวกัน เพื่อให้ลำดับการบวกต่างจาก cumsum หลัง sort
+  ต่างกันได้แค่ระดับ floating point (rtol 1e-9)
+- ทุก benchmark (SPY ที่มีหุ้นตั้งต้นเดิมเป็น 0 + ตัวใหม่ที่ยังไม่มีคอลัมน์) เริ่มจากมูลค่าเท่ากันในแถวแรก
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tempfile
+import numpy as np
+import pandas as pd
+from benchmarks import synthetic
+
+RTOL = 1e-9
+
+def baseline_replay(hx_dates, trans, price_series, initial_shares):
+    # loop เดิมก่อน vectorize (ราคาแต่ละ transaction ด้วย Series.asof แล้วบวกตามลำดับในตาราง)
+    shares, values = [], []
+    for date in pd.DatetimeIndex(hx_dates):
+        rel_trans = trans[trans['Date'] <= date]
+        add_share = 0.0
+        for _, t_row in rel_trans.iterrows():
+            add_share += t_row['Total Value ($)'] / price_series.asof(t_row['Date'])
+        share = initial_shares + add_share
+        shares.append(share)
+        values.append(share * price_series.asof(date))
+    return np.array(shares), np.array(values)
+
+def check_replay(n_trans, days, seed):
+    import utils
+
+    tickers = ('SPY', 'QQQ')
+    prices = synthetic.make_prices(tickers, days, seed)
+    trans = synthetic.make_transactions(n_trans, days, seed).sample(frac=1, random_state=seed)
+    hx_dates = pd.date_range(end=prices.index[-1], periods=days, freq='D')
+    same_day = int(trans['Date'].duplicated().sum())
+
+    shares, values = utils.replay_benchmark(hx_dates, trans, prices, np.array([1.5, 0.0]))
+    worst = 0.0
+    for i, ticker in enumerate(tickers):
+        expect_shares, expect_values = baseline_replay(hx_dates, trans, prices[ticker], [1.5, 0.0][i])
+        np.testing.assert_allclose(shares[:, i], expect_shares, rtol=RTOL)
+        np.testing.assert_allclose(values[:, i], expect_values, rtol=RTOL)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            worst = max(worst, np.nanmax(np.abs(shares[:, i] / expect_shares - 1)))
+    print(f"replay_benchmark OK: {len(trans)} transactions ({same_day} same-day), {days} rows, "
+          f"{len(tickers)} tickers, max relative diff {worst:.1e}")
+
+def check_seed(n_trans, days, seed):
+    import utils
+    from benchmarks.run import install
+
+    tickers = tuple(utils.BENCHMARKS)
+    workbook = synthetic.make_workbook(n_trans=n_trans, days=days, n_stocks=3, seed=seed, tickers=tickers)
+    # SPY_Shares แถวแรกเป็น 0 แบบ sheet เก่า (QQQ / VT / THD ยังไม่มีคอลัมน์)
+    workbook['Portfolio_Hx'].loc[0, 'SPY_Shares'] = 0
+    trans = synthetic.make_transactions(n_trans, days, seed)
+    value_cols = [utils.benchmark_columns(t)[0] for t in tickers]
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = install(workbook, tmp)
+        for mode in ("incremental", "full"):
+            conn.worksheets.pop("Portfolio_Hx", None)
+            hx = utils.update_portfolio_hx(1_000.0, 900.0, trans, benchmark_ticker=list(tickers), incremental=(mode == "incremental"))
+            first = hx.loc[0, value_cols].to_numpy(dtype=float)
+            np.testing.assert_allclose(first, float(hx.loc[0, 'My_Stock_Value']), rtol=RTOL, err_msg=f"[{mode}] {dict(zip(value_cols, first))}")
+    print(f"benchmark seed OK: {len(tickers)} benchmarks start from My_Stock_Value {first[0]:,.2f} on the first row")
+
+def main(n_trans=200, days=120, seed=0):
+    check_replay(n_trans, days, seed)
+    check_seed(n_trans, days, seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+ตรวจว่า returns.performance / risk.analyze รับ Portfolio_Hx ที่มีวันที่ซ้ำได้ (อัปเดตวันเดียวกันหลายครั้ง)
+
+    python -m benchmarks.check_returns
+
+แถวซ้ำถูกสลับลำดับ + บางซีรีส์มีค่าว่าง -> แต่ละซีรีส์ข้ามแถวต่างกัน (เคย error ตอนรวม TWR เป็นตารางเดียว)
+ผลต้องเท่ากับ Portfolio_Hx ที่เหลือแถวล่าสุดของแต่ละวันอยู่แล้ว
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from benchmarks import synthetic
+
+def main(days=40, seed=0):
+    import returns
+    import risk
+
+    prices = synthetic.make_prices(('SPY',), days, seed)
+    clean = synthetic.make_portfolio_hx(days, seed, prices)
+    clean.loc[5, 'My_Stock_Value'] = np.nan
+
+    # แถวของวันที่ 20 ถูกบันทึกสองครั้ง: ครั้งแรก (ค่าเก่า) อยู่ท้ายตาราง ครั้งหลังอยู่ที่เดิม
+    stale = clean.iloc[[20]].assign(My_Stock_Value=np.nan, My_Total_Value=clean['My_Total_Value'].iloc[20] * 0.9)
+    hx = pd.concat([stale, clean], ignore_index=True)
+
+    got = returns.performance(hx)
+    expect = returns.performance(clean)
+    assert got['twr'].index.is_unique, "TWR มีวันที่ซ้ำ"
+    pd.testing.assert_frame_equal(got['twr'], expect['twr'])
+    pd.testing.assert_frame_equal(got['summary'], expect['summary'])
+
+    for series in ('Stock', 'Total'):
+        result = risk.analyze(hx, None, prices, series=series, window='3M')
+        assert result['summary'] == risk.analyze(clean, None, prices, series=series, window='3M')['summary']
+    print(f"returns / risk OK: {len(hx)} rows, {len(hx) - hx['Date'].nunique()} duplicated date, "
+          f"{int(hx['My_Stock_Value'].isna().sum())} missing stock values")
+
+if __name__ == "__main__":
+    main()
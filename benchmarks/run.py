@@ -0,0 +1,256 @@
+"""
+Benchmark suite: จับเวลา loader / engine หลักด้วย workbook สังเคราะห์ (ไม่ต่อเน็ต)
+
+    python -m benchmarks.run            # ชุดเร็ว (เล็ก / กลาง / ใหญ่)
+    python -m benchmarks.run --full     # ครบทุกขนาด transaction x history
+    python -m benchmarks.run --no-save  # ไม่บันทึกผล
+
+ผลแต่ละรอบต่อท้ายใน benchmarks/results.jsonl (คีย์ด้วย commit) แล้วเทียบกับ commit ก่อนหน้าให้เห็น regression
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import timedelta
+from itertools import product
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import synthetic
+
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results.jsonl")
+TRANSACTION_SIZES = [10, 1_000, 50_000]
+HISTORY_DAYS = [30, 365 * 5, 365 * 20]
+REGRESSION_PCT = 20
+
+def install(workbook, cache_dir):
+    """
+    ต่อแอปเข้ากับ workbook สังเคราะห์: st.connection / sheets._open_spreadsheet -> FakeConnection, price cache -> SQLite ชั่วคราว (offline)
+    """
+    import streamlit as st
+    import price_cache
+    import snapshot_cache
+    import sheets
+
+    conn = synthetic.FakeConnection(workbook)
+    st.connection = lambda *args, **kwargs: conn
+    sheets._open_spreadsheet = lambda: conn
+    snapshot_cache.CACHE_DIR = os.path.join(cache_dir, "snapshots")
+    price_cache.CACHE_PATH = os.path.join(cache_dir, "prices.sqlite")
+    price_cache.OFFLINE = True
+    price_cache.store_prices(workbook["prices"], path=price_cache.CACHE_PATH)
+    # ไม่ให้ loader คืน frame ที่ cache ไว้จาก workbook ก่อนหน้า
+    clear_caches()
+    return conn
+
+def clear_caches():
+    # cold = ไม่มีทั้ง st.cache_data / st.cache_resource (loader shared=True) และสำเนา snapshot ในเครื่อง (ต้องอ่านจากชีท)
+    import shutil
+    import streamlit as st
+    import snapshot_cache
+    import chart_cache
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    chart_cache.clear()
+    shutil.rmtree(snapshot_cache.CACHE_DIR, ignore_errors=True)
+    snapshot_cache.served.clear()
+
+def timeit(fn, setup=None, repeat=5):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+# ===========================
+# Cases
+# ===========================
+def bench_portfolio_hx(n_trans, days, repeat):
+    import utils
+
+    workbook = synthetic.make_workbook(n_trans=n_trans, days=days)
+    trans = synthetic.make_transactions(n_trans, days)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = install(workbook, tmp)
+        for mode in ("full", "incremental"):
+            def reset():
+                conn.worksheets.pop("Portfolio_Hx", None)
+            def run():
+                utils.update_portfolio_hx(1_000.0, 900.0, trans, benchmark_ticker="SPY", incremental=(mode == "incremental"))
+            results[f"update_portfolio_hx[{mode}] trans={n_trans} days={days}"] = timeit(run, reset, repeat)
+    return results
+
+def bench_views(days, repeat):
+    import sheets
+    import downsample
+    from views import Overview, Funds, pyramid
+
+    workbook = synthetic.make_workbook(n_trans=10, days=days)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        install(workbook, tmp)
+
+        def overview():
+            df = Overview.load_data()
+            Overview.build_asset_items(df)
+        results[f"overview.load_data+build_asset_items days={days}"] = timeit(overview, clear_caches, repeat)
+
+        # ลดจุดกราฟ Wealth Growth (ไม่ผ่าน cache: วัดตัว LTTB / min-max จริง)
+        hx = Overview.load_history_data()
+        xs = downsample._x_values(hx['Date'])
+        values = hx[['My_Total_Value', 'My_Total_Cost']].to_numpy(dtype=float)
+        for method in downsample.METHODS:
+            results[f"downsample.{method} rows={len(hx)}"] = timeit(lambda: downsample._select(xs, values, downsample.MAX_POINTS, method), None, repeat)
+
+        results[f"funds.load_Fund_Hx years={max(1, days // 365)}"] = timeit(Funds.load_Fund_Hx, clear_caches, repeat)
+        results[f"funds.load_fund_matrix years={max(1, days // 365)}"] = timeit(Funds.load_fund_matrix, clear_caches, repeat)
+
+        allocation_df = pyramid.load_pyramid_data()
+        results[f"pyramid.render_pyramid_from_db days={days}"] = timeit(lambda: pyramid.render_pyramid_from_db(allocation_df), None, repeat)
+    return results
+
+def bench_storage(days, repeat):
+    """
+    อ่าน Portfolio_Hx ทั้งตาราง / ช่วง 90 วันล่าสุด: Google Sheets (ของปลอม) เทียบกับ SQLite ในเครื่อง
+    และสำเนา Parquet ของ snapshot_cache
+    """
+    import storage
+
+    workbook = synthetic.make_workbook(n_trans=10, days=days)
+    end = synthetic._end_date()
+    start = end - timedelta(days=90)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        install(workbook, tmp)
+        sqlite = storage.SQLiteBackend(os.path.join(tmp, "wealth.sqlite"))
+        storage.copy_tables(storage.GSheetsBackend(), sqlite, ["portfolio_hx"])
+        storage.read("portfolio_hx")
+        results[f"storage.read portfolio_hx (snapshot) days={days}"] = timeit(
+            lambda: storage.read("portfolio_hx"), None, repeat)
+        for backend in (storage.GSheetsBackend(), sqlite):
+            results[f"storage[{backend.name}].read portfolio_hx days={days}"] = timeit(
+                lambda: backend.read("portfolio_hx"), None, repeat)
+            results[f"storage[{backend.name}].read portfolio_hx 90d days={days}"] = timeit(
+                lambda: backend.read("portfolio_hx", start, end), None, repeat)
+    return results
+
+def bench_prefetch(repeat, latency=0.2):
+    """
+    cold load ทุกตาราง (แต่ละ read หน่วง latency วินาที): ทีละตาราง vs storage.prefetch (พร้อมกัน)
+    """
+    import storage
+
+    workbook = synthetic.make_workbook(n_trans=1_000)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = install(workbook, tmp)
+        conn.latency = latency
+        def sequential():
+            for table in storage.TABLES:
+                storage.read(table)
+        results[f"cold read all tables sequential latency={latency}s"] = timeit(sequential, clear_caches, repeat)
+        results[f"cold read all tables storage.prefetch latency={latency}s"] = timeit(storage.prefetch, clear_caches, repeat)
+    return results
+
+# ===========================
+# Results storage
+# ===========================
+def current_commit():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, text=True).strip()
+        return sha + ("-dirty" if dirty else "")
+    except Exception:
+        return "unknown"
+
+def load_results():
+    if not os.path.exists(RESULTS_PATH):
+        return []
+    with open(RESULTS_PATH) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def previous_result(history, case, commit):
+    for row in reversed(history):
+        if row["case"] == case and row["commit"] != commit:
+            return row
+    return None
+
+def report(results, commit, save=True, memory=None):
+    """
+    พิมพ์ตารางเทียบกับ commit ก่อนหน้า + บันทึกลง results.jsonl
+    memory = {case: peak MiB} (ถ้ามี) บันทึกเป็น peak_mib ของแต่ละ case และเทียบกับครั้งก่อนด้วย
+    """
+    history = load_results()
+    rows = []
+    print(f"\ncommit {commit}")
+    print(f"{'case':<62} {'median ms':>10} {'min ms':>10} {'prev ms':>10} {'change':>8}")
+    for case, times in results.items():
+        row = {
+            "commit": commit,
+            "ts": time.time(),
+            "case": case,
+            "median_ms": round(statistics.median(times), 3),
+            "min_ms": round(min(times), 3),
+            "repeat": len(times),
+        }
+        if memory and case in memory:
+            row["peak_mib"] = round(memory[case], 2)
+        rows.append(row)
+        prev = previous_result(history, case, commit)
+        if prev:
+            change = (row["median_ms"] - prev["median_ms"]) / prev["median_ms"] * 100
+            flag = " ⚠️" if change > REGRESSION_PCT else ""
+            print(f"{case:<62} {row['median_ms']:>10.2f} {row['min_ms']:>10.2f} {prev['median_ms']:>10.2f} {change:>+7.1f}%{flag}")
+        else:
+            print(f"{case:<62} {row['median_ms']:>10.2f} {row['min_ms']:>10.2f} {'-':>10} {'-':>8}")
+
+    if memory:
+        print(f"\n{'case':<62} {'peak MiB':>10} {'prev MiB':>10} {'change':>8}")
+        for row in rows:
+            if "peak_mib" not in row:
+                continue
+            prev = previous_result(history, row["case"], commit)
+            if prev and prev.get("peak_mib"):
+                change = (row["peak_mib"] - prev["peak_mib"]) / prev["peak_mib"] * 100
+                flag = " ⚠️" if change > REGRESSION_PCT else ""
+                print(f"{row['case']:<62} {row['peak_mib']:>10.1f} {prev['peak_mib']:>10.1f} {change:>+7.1f}%{flag}")
+            else:
+                print(f"{row['case']:<62} {row['peak_mib']:>10.1f} {'-':>10} {'-':>8}")
+
+    if save:
+        with open(RESULTS_PATH, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        print(f"\nsaved {len(rows)} results to {os.path.relpath(RESULTS_PATH, ROOT)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loaders and the benchmark replay engine on synthetic workbooks")
+    parser.add_argument("--full", action="store_true", help="run every transaction x history size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-save", action="store_true", help="do not append results to benchmarks/results.jsonl")
+    args = parser.parse_args(argv)
+
+    sizes = list(product(TRANSACTION_SIZES, HISTORY_DAYS)) if args.full else list(zip(TRANSACTION_SIZES, HISTORY_DAYS))
+
+    results = {}
+    for n_trans, days in sizes:
+        results.update(bench_portfolio_hx(n_trans, days, args.repeat))
+    for days in sorted(set(d for _, d in sizes)):
+        results.update(bench_views(days, args.repeat))
+        results.update(bench_storage(days, args.repeat))
+
+    results.update(bench_prefetch(args.repeat))
+
+    report(results, current_commit(), save=not args.no_save)
+
+if __name__ == "__main__":
+    main()
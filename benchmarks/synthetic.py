@@ -0,0 +1,254 @@
+import re
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+# ===========================
+# Synthetic workbook
+# ===========================
+# สร้างข้อมูลปลอมที่หน้าตาเหมือน Google Sheet จริง (rebalance / Buying track / Fund summary / Portfolio_Hx)
+# ใช้กับ benchmark โดยไม่ต้องต่อเน็ต ขนาดปรับได้ตั้งแต่ 10 ถึง 50,000 transaction และ 30 วันถึง 20 ปี
+
+FUNDS = ['SCBGQUALE', 'SCBCEHE', 'NDQ100', 'S&P500']
+STOCK_TYPES = ['Tech', 'Defensive', 'Growth', 'Dividend']
+ASSETS = ['💵 Fund', '🚀 US stock', '🏦 Savings', '🪙 Gold', '🏠 Property', '💳 Fund Saving', '📈 Stock Saving']
+
+def _end_date():
+    # ข้อมูลจบที่เมื่อวาน -> update_portfolio_hx จะเพิ่มแถววันนี้เหมือนใช้งานจริง
+    return pd.Timestamp(datetime.now().date()) - timedelta(days=1)
+
+def make_rebalance(n_stocks=25, seed=0):
+    """
+    grid ดิบของ sheet "rebalance" (ไม่มี header) ตำแหน่งตารางตรงกับที่แต่ละหน้าอ่าน
+    - แถว 1 = header ของ asset (คอลัมน์ 6:11) และ pyramid (คอลัมน์ 11:18)
+    - แถว 14 = header ของรายการหุ้น US (คอลัมน์ 0:7)
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = 16 + n_stocks
+    grid = pd.DataFrame(np.full((n_rows, 18), np.nan, dtype=object))
+    grid.iloc[0, 0] = 'Rebalance'
+
+    # asset block
+    grid.iloc[1, 6:11] = ['Asset', 'Invest', 'Value', 'Gain/Loss', 'Portion']
+    invest = rng.uniform(50_000, 500_000, len(ASSETS))
+    value = invest * rng.uniform(0.8, 1.4, len(ASSETS))
+    for i, name in enumerate(ASSETS):
+        grid.iloc[2 + i, 6:11] = [name, f"{invest[i]:,.2f}", f"{value[i]:,.2f}", f"{value[i] - invest[i]:,.0f}", value[i] / value.sum()]
+    grid.iloc[2 + len(ASSETS), 6:11] = ['Grand Total', f"{invest.sum():,.2f}", f"{value.sum():,.2f}", '', 1.0]
+
+    # pyramid block
+    grid.iloc[1, 11:18] = ['Pyramid', 'Asset', 'Invest', 'Value', 'GainLoss', 'Portion (%)', 'Target(%)']
+    portions = rng.dirichlet(np.ones(3))
+    layers = [('Growth', 'US stock, Stock Saving', 0.2), ('Core', 'Fund, Fund Saving, Gold', 0.5), ('Foundation', 'Savings, Property', 0.3)]
+    for i, (layer, assets, target) in enumerate(layers):
+        inv = rng.uniform(100_000, 900_000)
+        grid.iloc[2 + i, 11:18] = [layer, assets, inv, inv * 1.1, 0.1, portions[i], target]
+
+    # US stock block
+    grid.iloc[14, 0:7] = ['US stock', 'Type', 'Invest', 'Value', 'Profit/loss', '%', 'Portion']
+    inv = rng.uniform(100, 5_000, n_stocks)
+    val = inv * rng.uniform(0.6, 2.0, n_stocks)
+    for i in range(n_stocks):
+        grid.iloc[15 + i, 0:7] = [f'TK{i:03d}', STOCK_TYPES[i % len(STOCK_TYPES)], inv[i], val[i], val[i] - inv[i], (val[i] - inv[i]) / inv[i], val[i] / val.sum()]
+    grid.iloc[15 + n_stocks, 0:7] = ['Total', '', inv.sum(), val.sum(), val.sum() - inv.sum(), '', 1.0]
+    return grid
+
+def make_buying_track(n_trans=1000, days=365 * 5, seed=0):
+    """
+    sheet "Buying track" (หลัง skiprows=6) วันที่เป็น '%d/%m/%Y' แบบเดียวกับชีทจริง
+    """
+    rng = np.random.default_rng(seed)
+    end = _end_date()
+    dates = end - pd.to_timedelta(np.sort(rng.integers(0, days, n_trans))[::-1], unit='D')
+    usd = rng.uniform(20, 2_000, n_trans).round(2)
+    return pd.DataFrame({
+        'Date': dates.strftime('%d/%m/%Y'),
+        'Ticker': [f'TK{i % 25:03d}' for i in range(n_trans)],
+        'Buy/Sell': np.where(rng.random(n_trans) < 0.95, 'Buy', 'Sell'),
+        'Total Value ($)': usd,
+        'Net Value (THB)': (usd * 35).round(2),
+    })
+
+def make_transactions(n_trans=1000, days=365 * 5, seed=0):
+    """
+    transaction ที่ผ่าน US_stocks.load_transaction_history แล้ว (Date เป็น datetime, เฉพาะ Buy)
+    """
+    df = make_buying_track(n_trans, days, seed)
+    df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y')
+    return df[df['Buy/Sell'] == 'Buy'].sort_values('Date')
+
+def make_fund_summary(seed=0):
+    # sheet "Fund summary" (skiprows=5): กองทุน 4 ตัว + แถว total (แถวที่ 4)
+    rng = np.random.default_rng(seed)
+    invest = rng.uniform(50_000, 300_000, len(FUNDS))
+    value = invest * rng.uniform(0.9, 1.3, len(FUNDS))
+    df = pd.DataFrame({'Name': FUNDS, 'Invest': invest, 'Value': value})
+    total = pd.DataFrame([{'Name': 'Total', 'Invest': invest.sum(), 'Value': value.sum()}])
+    df = pd.concat([df, total], ignore_index=True)
+    df['P/L'] = df['Value'] - df['Invest']
+    df['%'] = df['P/L'] / df['Invest']
+    df['Portion'] = df['Value'] / value.sum()
+    return df
+
+def make_fund_history(years=5, seed=0):
+    """
+    sheet "Fund summary" (skiprows=15): ผลตอบแทนรายเดือนแบบ long format
+    วันที่ ('%m/%Y') ใส่แค่แถวแรกของแต่ละเดือน แถวที่เหลือว่าง (loader จะ ffill เอง)
+    """
+    rng = np.random.default_rng(seed)
+    months = pd.date_range(end=_end_date(), periods=max(1, years * 12), freq='MS')
+    returns = np.cumsum(rng.normal(0.005, 0.04, (len(months), len(FUNDS))), axis=0)
+    rows = []
+    for m, month in enumerate(months):
+        for f, name in enumerate(FUNDS):
+            rows.append({'Date': month.strftime('%m/%Y') if f == 0 else np.nan, 'Name': name, '%': returns[m, f]})
+    return pd.DataFrame(rows)
+
+def make_prices(tickers=('SPY',), days=365 * 5, seed=0):
+    """
+    ราคาปิดรายวัน (วันทำการ) แบบ random walk ของ benchmark แต่ละตัว
+    """
+    rng = np.random.default_rng(seed)
+    end = _end_date()
+    idx = pd.bdate_range(end - timedelta(days=days + 14), end)
+    steps = rng.normal(0.0003, 0.012, (len(idx), len(tickers)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=idx, columns=list(tickers))
+
+def make_portfolio_hx(days=365 * 5, seed=0, prices=None, buying_track=None):
+    """
+    sheet "Portfolio_Hx" รายวัน จบที่เมื่อวาน (คอลัมน์เหมือนของจริง)
+    ถ้าให้ buying_track มา ต้นทุนหุ้น / จำนวนหุ้น benchmark เดินตามรายการซื้อขายจริง (TWR / XIRR ออกมาสมเหตุสมผล)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=_end_date(), periods=days, freq='D')
+    spy = prices['SPY'].reindex(dates, method='ffill').bfill().to_numpy() if prices is not None else np.full(days, 100.0)
+    if buying_track is not None:
+        trade_dates = pd.to_datetime(buying_track['Date'], format='%d/%m/%Y').to_numpy()
+        usd = buying_track['Total Value ($)'].to_numpy(dtype=float)
+        buy = (buying_track['Buy/Sell'] == 'Buy').to_numpy()
+        pos = dates.searchsorted(trade_dates)
+        inside = pos < days
+        flows = np.bincount(pos[inside], weights=np.where(buy, usd, -usd)[inside], minlength=days)
+        bought = np.bincount(pos[inside], weights=np.where(buy, usd, 0.0)[inside], minlength=days)
+        stock_cost = np.cumsum(flows) + 1_000
+        shares = np.cumsum(bought / spy) + 1_000 / spy[0]
+    else:
+        stock_cost = np.cumsum(rng.uniform(0, 50, days)) + 1_000
+        shares = stock_cost / spy
+    # มูลค่า = ต้นทุน x ผลตอบแทนสะสมแบบ random walk
+    stock_value = stock_cost * np.exp(np.cumsum(rng.normal(0.0003, 0.01, days)))
+    fund_cost = np.cumsum(rng.uniform(0, 500, days)) + 50_000
+    fund_value = fund_cost * np.exp(np.cumsum(rng.normal(0, 0.005, days)))
+    return pd.DataFrame({
+        'Date': dates.strftime('%Y-%m-%d'),
+        'My_Stock_Cost': stock_cost,
+        'My_Stock_Value': stock_value,
+        'Strategy_SP500_Value': shares * spy,
+        'SPY_Shares': shares,
+        'My_Fund_Cost': fund_cost,
+        'My_Fund_Value': fund_value,
+        'My_Total_Cost': stock_cost * 35 + fund_cost,
+        'My_Total_Value': stock_value * 35 + fund_value,
+    })
+
+def make_workbook(n_trans=1000, days=365 * 5, n_stocks=25, seed=0, tickers=('SPY',)):
+    """
+    ครบทุก worksheet ที่แอปอ่าน + ราคา benchmark สำหรับ seed price cache
+    """
+    # ราคาของ benchmark + หุ้นทุกตัวในพอร์ต (หน้า Optimizer ใช้ราคาหุ้นรายตัว)
+    prices = make_prices(tuple(tickers) + tuple(f'TK{i:03d}' for i in range(n_stocks)), days, seed)
+    buying_track = make_buying_track(n_trans, days, seed)
+    return {
+        'rebalance': make_rebalance(n_stocks, seed),
+        ('Buying track', 6): buying_track,
+        ('Fund summary', 5): make_fund_summary(seed),
+        ('Fund summary', 15): make_fund_history(max(1, days // 365), seed),
+        'Portfolio_Hx': make_portfolio_hx(days, seed, prices, buying_track),
+        'prices': prices,
+    }
+
+# ===========================
+# Stand-in for GSheetsConnection
+# ===========================
+def _a1_to_rowcol(a1):
+    m = re.match(r'([A-Z]+)(\d+)', a1)
+    col = 0
+    for ch in m.group(1):
+        col = col * 26 + ord(ch) - 64
+    return int(m.group(2)), col
+
+class FakeWorksheet:
+    """
+    worksheet ในหน่วยความจำ รองรับ method ของ gspread ที่ sheets.upsert_rows ใช้
+    """
+    def __init__(self, df):
+        self.grid = [list(df.columns)] + [["" if pd.isna(v) else v for v in row] for row in df.itertuples(index=False)]
+
+    def _set(self, row, col, value):
+        while len(self.grid) < row:
+            self.grid.append([])
+        cells = self.grid[row - 1]
+        while len(cells) < col:
+            cells.append("")
+        cells[col - 1] = value
+
+    def row_values(self, row):
+        return list(self.grid[row - 1])
+
+    def col_values(self, col):
+        return [str(r[col - 1]) if len(r) >= col else "" for r in self.grid]
+
+    def update(self, range_name=None, values=None, value_input_option=None):
+        row, col = _a1_to_rowcol(range_name.split(":")[0])
+        for i, line in enumerate(values):
+            for j, v in enumerate(line):
+                self._set(row + i, col + j, v)
+
+    def batch_update(self, data, value_input_option=None):
+        for item in data:
+            self.update(range_name=item["range"], values=item["values"])
+
+    def append_rows(self, rows, value_input_option=None):
+        self.grid.extend(list(r) for r in rows)
+
+    def to_frame(self):
+        width = len(self.grid[0])
+        rows = [r + [""] * (width - len(r)) for r in self.grid[1:]]
+        df = pd.DataFrame(rows, columns=self.grid[0]).replace("", np.nan).infer_objects()
+        return df
+
+class FakeConnection:
+    """
+    แทน st.connection("gsheets") ด้วย workbook จาก make_workbook()
+    read() คืนตารางตาม (worksheet, skiprows) / update() เขียนทับทั้งชีท / worksheet() ใช้กับ sheets.upsert_rows
+    """
+    def __init__(self, workbook, latency=0.0):
+        self.workbook = dict(workbook)
+        self.worksheets = {}
+        self.reads = 0
+        self.latency = latency # วินาทีต่อการอ่าน 1 ครั้ง (จำลอง round-trip ไป Google)
+
+    def _worksheet(self, name):
+        if name not in self.worksheets:
+            self.worksheets[name] = FakeWorksheet(self.workbook[name])
+        return self.worksheets[name]
+
+    def read(self, worksheet=None, skiprows=None, header='infer', **kwargs):
+        self.reads += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if worksheet in self.worksheets:
+            return self.worksheets[worksheet].to_frame()
+        if header is None:
+            return self.workbook[worksheet].copy()
+        key = (worksheet, skiprows) if (worksheet, skiprows) in self.workbook else worksheet
+        return self.workbook[key].copy()
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        self.worksheets[worksheet] = FakeWorksheet(data)
+        return data
+
+    def worksheet(self, name):
+        # แทน gspread Spreadsheet.worksheet (sheets._open_spreadsheet ถูกแทนด้วย connection นี้ตอน install)
+        return self._worksheet(name)
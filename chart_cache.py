@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+import perf
+
+# ===========================
+# Chart cache (ใช้ร่วมกันทุก session)
+# ===========================
+# กราฟที่ข้อมูลไม่เปลี่ยนไม่ต้องสร้างใหม่ทุก rerun: key = ชื่อกราฟ + hash ของ frame ที่ใช้ + ค่าอื่นที่มีผลกับกราฟ
+# - Altair: เก็บ vega-lite spec (dict จาก to_dict()) แล้ววาดด้วย st.vega_lite_chart
+#   (ข้ามทั้งการสร้าง chart และ to_dict ที่ validate ทั้ง spec ทุกครั้ง)
+# - Plotly: เก็บ Figure (st.plotly_chart รับ Figure ได้เร็วกว่า dict/JSON ที่ต้อง validate ใหม่)
+# ขนาดของแต่ละกราฟนับจาก JSON ตอนเก็บครั้งแรก / เกิน MAX_BYTES หรือ MAX_ENTRIES -> ทิ้งตัวที่ไม่ได้ใช้นานสุด (LRU)
+# spec / Figure ที่ได้ใช้ร่วมกันทุก session: ห้ามแก้ (เพิ่ม trace / update_layout ให้ทำใน build)
+MAX_BYTES = int(float(os.environ.get("CHART_CACHE_MB", "32")) * 2**20)
+MAX_ENTRIES = 128
+
+_entries = OrderedDict()  # key -> (spec, ขนาด bytes)
+_size = 0
+_lock = threading.Lock()
+
+def fingerprint(frames, params=()):
+    """
+    hash ของเนื้อหา frames + repr ของ params (ข้อมูลหรือค่าที่ส่งให้กราฟเปลี่ยน = key ใหม่)
+    """
+    return perf.fingerprint(*frames, params)
+
+def _get(name, key, build, serialize, nbytes):
+    global _size
+    t0 = time.perf_counter()
+    with _lock:
+        hit = _entries.get(key)
+        if hit is not None:
+            _entries.move_to_end(key)
+    if hit is not None:
+        perf.record(name, (time.perf_counter() - t0) * 1000, cache="hit")
+        return hit[0]
+
+    # สร้างนอก lock (session อื่นใช้กราฟอื่นได้ระหว่างนี้ / สร้างซ้ำพร้อมกันได้แต่ผลเหมือนกัน)
+    spec = serialize(build())
+    size = nbytes(spec)
+    with _lock:
+        if key not in _entries and size <= MAX_BYTES:
+            _entries[key] = (spec, size)
+            _size += size
+            while _size > MAX_BYTES or len(_entries) > MAX_ENTRIES:
+                _, (_, dropped) = _entries.popitem(last=False)
+                _size -= dropped
+    perf.record(name, (time.perf_counter() - t0) * 1000, cache="miss")
+    return spec
+
+def altair_spec(name, frames, build, params=()):
+    """
+    vega-lite spec ของกราฟ Altair ที่ build() สร้างจาก frames (ใช้กับ st.vega_lite_chart)
+    """
+    key = (name, fingerprint(frames, params))
+    return _get(name, key, build, lambda chart: chart.to_dict(), lambda spec: len(json.dumps(spec, default=str)))
+
+def plotly_figure(name, frames, build, params=()):
+    """
+    Plotly Figure ที่ build() สร้างจาก frames (ใช้กับ st.plotly_chart)
+    """
+    key = (name, fingerprint(frames, params))
+    return _get(name, key, build, lambda fig: fig, lambda fig: len(fig.to_json()))
+
+def clear():
+    global _size
+    with _lock:
+        _entries.clear()
+        _size = 0
+
+def usage():
+    """
+    (จำนวนกราฟ, ขนาดรวม bytes) ที่ cache อยู่
+    """
+    with _lock:
+        return len(_entries), _size
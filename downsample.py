@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import perf
+
+# ===========================
+# Downsampling กราฟประวัติยาว ๆ
+# ===========================
+# กราฟเส้น/พื้นที่ไม่ต้องส่งทุกจุดไป browser: กว้างแค่ ~800 pixel ก็เห็นได้แค่ ~800 จุดต่อเส้น
+# - LTTB (Largest-Triangle-Three-Buckets, Steinarsson 2013): แบ่งเป็น n ช่อง เลือกจุดในแต่ละช่อง
+#   ที่ทำสามเหลี่ยมใหญ่สุดกับจุดที่เลือกในช่องก่อนหน้า + ค่าเฉลี่ยของช่องถัดไป -> รูปร่าง / ยอด / ก้นยังอยู่
+# - min/max: เก็บจุดต่ำสุด + สูงสุดของทุกช่อง (เร็วกว่า ไม่พลาด spike เลย แต่ได้ 2 จุดต่อช่อง)
+# หลายเส้นที่ใช้แกน x เดียวกัน: แบ่งโควต้า n ให้แต่ละเส้นเลือกจุดเอง แล้วเอาแถวรวมกัน (ไม่เกิน n แถว = n จุดต่อเส้น)
+# จุดที่เลือกเป็นแถวจริงของข้อมูล (ไม่เฉลี่ยค่า) ผล cache ตาม hash ของข้อมูล
+MAX_POINTS = 800
+METHODS = ("lttb", "minmax")
+
+def lttb_index(x, y, n):
+    """
+    ตำแหน่ง (เรียงจากน้อยไปมาก) ของ n จุดที่ LTTB เลือกจาก (x, y) ที่เรียงตาม x แล้ว (รวมจุดแรก + จุดสุดท้ายเสมอ)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    # ช่องกลาง n - 2 ช่อง (จุดแรก / จุดสุดท้ายเป็นช่องของตัวเอง)
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    starts, stops = edges[:-1], edges[1:]
+    # ค่าเฉลี่ยของแต่ละช่อง (ใช้เป็นจุด c ของช่องก่อนหน้า) คิดทีเดียวด้วย cumsum
+    cx = np.concatenate([[0.0], np.cumsum(x)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+    counts = stops - starts
+    avg_x = np.append((cx[stops] - cx[starts]) / counts, x[-1])
+    avg_y = np.append((cy[stops] - cy[starts]) / counts, y[-1])
+
+    picked = np.empty(n, dtype=np.int64)
+    picked[0], picked[-1] = 0, size - 1
+    a = 0
+    for i, (lo, hi) in enumerate(zip(starts, stops)):
+        bx, by = x[lo:hi], y[lo:hi]
+        # 2 x พื้นที่สามเหลี่ยม (a, b, c) ไม่ต้องหาร 2 เพราะเทียบกันเอง
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+def minmax_index(y, n):
+    """
+    ตำแหน่งของจุดต่ำสุด + สูงสุดในแต่ละช่อง ((n - 2) // 2 ช่อง) + จุดแรก / จุดสุดท้าย (ไม่เกิน n จุด)
+    """
+    y = np.asarray(y, dtype=float)
+    size = len(y)
+    if n >= size or n < 4:
+        return np.arange(size)
+    buckets = (n - 2) // 2
+    edges = np.linspace(0, size, buckets + 1).astype(int)
+    # เติมทุกช่องให้ยาวเท่ากัน (ค่าที่เกินเป็น nan) แล้วหา argmin / argmax ทีเดียวทั้ง matrix
+    width = int(np.diff(edges).max())
+    pos = edges[:-1, None] + np.arange(width)[None, :]
+    valid = pos < edges[1:, None]
+    block = np.where(valid, y[np.minimum(pos, size - 1)], np.nan)
+    lo = edges[:-1] + np.nanargmin(block, axis=1)
+    hi = edges[:-1] + np.nanargmax(block, axis=1)
+    return np.unique(np.concatenate([[0, size - 1], lo, hi]))
+
+def _x_values(x):
+    x = pd.Series(x)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+    return x.to_numpy(dtype=float)
+
+def _select(x, values, n, method):
+    rows = []
+    share = max(4, n // max(1, values.shape[1]))
+    for y in values.T:
+        # แต่ละเส้นเลือกเฉพาะจุดที่มีค่า (เส้น benchmark ที่เริ่มทีหลังเป็น nan ช่วงแรก)
+        valid = np.flatnonzero(~np.isnan(y))
+        if len(valid) == 0:
+            continue
+        idx = lttb_index(x[valid], y[valid], share) if method == "lttb" else minmax_index(y[valid], share)
+        rows.append(valid[idx])
+    return np.unique(np.concatenate(rows)) if rows else np.arange(len(x))
+
+@perf.cache_data(max_entries=32)
+def _cached_select(version, n, method, _x, _values):
+    return _select(_x, _values, n, method)
+
+def select(df, columns=None, x=None, n=MAX_POINTS, method="lttb"):
+    """
+    แถวของ df ที่พอสำหรับวาด columns (ค่าเริ่มต้น = ทุกคอลัมน์ตัวเลข) ไม่เกิน n แถว
+    x = คอลัมน์แกน x (None = ใช้ index) ต้องเรียงจากน้อยไปมาก / ข้อมูลไม่เกิน n แถวคืน df เดิม
+    """
+    if len(df) <= n:
+        return df
+    if columns is None:
+        columns = [c for c in df.columns if c != x and pd.api.types.is_numeric_dtype(df[c])]
+    xs = _x_values(df.index if x is None else df[x])
+    values = df[list(columns)].to_numpy(dtype=float)
+    return df.iloc[_cached_select(perf.fingerprint(xs, values), n, method, xs, values)]
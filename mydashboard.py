@@ -1,8 +1,10 @@
+import time
+_startup_t0 = time.perf_counter()
+
 import streamlit as st
-from views import Overview
-from views import US_stocks
-from views import Funds
-from views import AI_analyze
+import perf
+import snapshot_cache
+import storage
 
 st.set_page_config(
     page_title="Wealth Command Center",
@@ -12,20 +14,42 @@ st.set_page_config(
 
 
 st.title("🏥 Wealth Command Center")
+# อายุข้อมูล / offline (เติมหลังหน้ารันเสร็จ จะได้รู้ว่าใช้สำเนาไหนไปบ้าง)
+data_status = st.empty()
 
-tab1, tab2, tab3,tab4 = st.tabs(["Home","US Stocks", "Funds","🤖 AI Advisor"])
-
-with tab1:
-    Overview.show()
-with tab2:
+@perf.instrument
+def us_stocks_page():
     try:
-        US_stocks.show() 
+        perf.timed_import("views.US_stocks").show()
     except Exception as e:
         st.error(f"เกิดข้อผิดพลาดในการโหลดหน้าหุ้น: {e}")
         st.info("💡 อย่าลืมแก้ไฟล์ us_stock.py ให้มี def show(): ครอบโค้ดไว้นะครับ")
 
-with tab3:
-    Funds.show()
+# เปิด session ใหม่ -> โหลดทุก worksheet พร้อมกันครั้งเดียว (หน้าไหนก็ได้ข้อมูลจากสำเนาในเครื่องทันที)
+if "prefetched" not in st.session_state:
+    with st.spinner("Loading portfolio data..."):
+        storage.prefetch()
+    st.session_state["prefetched"] = True
+
+# st.navigation รันเฉพาะหน้าที่เลือก (st.tabs รันทุกแท็บทุกครั้งที่ rerun แม้จะซ่อนอยู่)
+# แต่ละหน้า import ตอนเปิดครั้งแรก (plotly / altair / yfinance / gemini ไม่ถูกโหลดถ้าไม่ได้ใช้)
+page = st.navigation([
+    st.Page(perf.lazy_page("views.Overview"), title="Home", url_path="home", default=True),
+    st.Page(us_stocks_page, title="US Stocks", url_path="us-stocks"),
+    st.Page(perf.lazy_page("views.Funds"), title="Funds", url_path="funds"),
+    st.Page(perf.lazy_page("views.Projection"), title="Projection", url_path="projection"),
+    st.Page(perf.lazy_page("views.Optimizer"), title="Optimizer", url_path="optimizer"),
+    st.Page(perf.lazy_page("views.AI_analyze"), title="🤖 AI Advisor", url_path="ai-advisor"),
+], position="top")
+
+# เวลาตั้งแต่เริ่ม script จนพร้อม render (วัดเฉพาะรอบแรกของ process)
+if "startup" not in perf.import_times:
+    perf.record_import_time("startup", (time.perf_counter() - _startup_t0) * 1000)
+
+page.run()
+
+with data_status.container():
+    snapshot_cache.render_status()
 
-with tab4:
-    AI_analyze.show()
\ No newline at end of file
+# ?debug=1 -> sidebar เวลาโหลด/render + export JSONL
+perf.render_debug_panel()
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import perf
+import schema
+
+# ===========================
+# Mean-variance optimizer (efficient frontier)
+# ===========================
+# ผลตอบแทนรายเดือนของกองทุน (matrix จาก Funds.load_fund_matrix) + หุ้น US (ราคาปิดสิ้นเดือนจาก price_cache)
+# -> ค่าเฉลี่ย / covariance ต่อปี (คำนวณครั้งเดียว cache ตาม hash ของ matrix)
+# -> frontier แบบห้าม short (น้ำหนัก >= 0 รวม = 1):
+#    แต่ละจุดคือ max  mu'w - (lam/2) w'Cov w  บน simplex ที่ lam ต่างกัน
+#    ทุกจุดแก้พร้อมกันเป็น matrix (จุด x สินทรัพย์) ด้วย projected gradient (FISTA) + projection ลง simplex ทีละทุกแถว
+MIN_MONTHS = 12
+FRONTIER_POINTS = 150
+MAX_ITER = 5000
+TOL = 1e-10
+
+def price_monthly_returns(prices):
+    """
+    ผลตอบแทนรายเดือนจากราคาปิดรายวัน (ราคาสุดท้ายของแต่ละเดือน)
+    """
+    if prices is None or prices.empty:
+        return pd.DataFrame()
+    month_end = prices.resample('ME').last()
+    month_end.index = month_end.index.to_period('M')
+    return month_end.pct_change(fill_method=None).iloc[1:]
+
+def return_matrix(fund_monthly, prices, min_months=MIN_MONTHS):
+    """
+    matrix ผลตอบแทนรายเดือน (เดือน x สินทรัพย์) เฉพาะเดือนที่มีครบทุกตัว
+    fund_monthly = ผลตอบแทนรายเดือนของกองทุน (index เป็นเดือน) / prices = ราคาปิดรายวันของหุ้น
+    สินทรัพย์ที่มีข้อมูลไม่ถึง min_months เดือนถูกตัดออกก่อน (ไม่ให้ตัวเดียวทำให้ช่วงสั้นลง)
+    """
+    parts = [schema.thaw(fund_monthly) if fund_monthly is not None else pd.DataFrame(), price_monthly_returns(prices)]
+    matrix = pd.concat([p for p in parts if not p.empty], axis=1) if any(not p.empty for p in parts) else pd.DataFrame()
+    if matrix.empty:
+        return matrix
+    matrix = matrix.loc[:, matrix.notna().sum() >= min_months]
+    return matrix.dropna()
+
+@perf.cache_data(max_entries=8)
+def _cached_moments(version, _matrix):
+    r = _matrix.to_numpy(dtype=float)
+    return r.mean(axis=0) * 12, np.cov(r, rowvar=False, ddof=1) * 12
+
+def moments(matrix):
+    """
+    (ผลตอบแทนเฉลี่ยต่อปี, covariance ต่อปี) ของ matrix รายเดือน (cache ตาม hash -> ข้อมูลไม่เปลี่ยนไม่คำนวณซ้ำ)
+    """
+    return _cached_moments(perf.fingerprint(matrix), matrix)
+
+def project_simplex(v):
+    """
+    ฉายทุกแถวของ v ลง simplex {w >= 0, sum w = 1} (Duchi et al. 2008) แบบ vectorized
+    """
+    n = v.shape[1]
+    u = -np.sort(-v, axis=1)
+    css = np.cumsum(u, axis=1) - 1
+    k = np.arange(1, n + 1)
+    rho = (u - css / k > 0).sum(axis=1)
+    theta = css[np.arange(len(v)), rho - 1] / rho
+    return np.maximum(v - theta[:, None], 0)
+
+def solve_batch(mu, cov, lam, max_iter=MAX_ITER, tol=TOL):
+    """
+    น้ำหนัก long-only ของทุก lam พร้อมกัน: max mu'w - (lam/2) w'Cov w  (lam = inf -> min variance)
+    คืน array (len(lam) x สินทรัพย์)
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    lam = np.asarray(lam, dtype=float)
+    n = len(mu)
+    # lam = inf: ใช้แค่เทอม variance (หารด้วย lam ทั้งสมการ)
+    finite = np.isfinite(lam)
+    risk = np.where(finite, lam, 1.0)[:, None]
+    gain = np.where(finite, 1.0, 0.0)[:, None]
+
+    lipschitz = max(np.linalg.eigvalsh(cov).max(), 1e-12)
+    step = 1 / (risk * lipschitz)
+    w = np.full((len(lam), n), 1 / n)
+    y, t = w.copy(), 1.0
+    for _ in range(max_iter):
+        grad = y @ cov * risk - mu[None, :] * gain
+        w_next = project_simplex(y - step * grad)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        done = np.abs(w_next - w).max() < tol
+        w, t = w_next, t_next
+        if done:
+            break
+    return w
+
+def portfolio_stats(weights, mu, cov):
+    """
+    (ผลตอบแทน, ความผันผวน) ต่อปีของทุกแถวของ weights
+    """
+    weights = np.atleast_2d(weights)
+    ret = weights @ mu
+    vol = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', weights, cov, weights), 0))
+    return ret, vol
+
+def _frontier(mu, cov, n_points, risk_free):
+    # lam ไล่จากเกือบ 0 (ผลตอบแทนสูงสุด) ถึงมาก (variance ต่ำสุด) ตามสเกลของ mu / cov
+    scale = max(np.abs(mu).max(), 1e-12) / max(np.linalg.eigvalsh(cov).max(), 1e-12)
+    lam = np.concatenate([np.geomspace(1e-2, 1e4, n_points - 1) * scale, [np.inf]])
+    weights = solve_batch(mu, cov, lam)
+    ret, vol = portfolio_stats(weights, mu, cov)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (ret - risk_free) / vol
+    min_var = int(np.argmin(vol))
+    max_sharpe = int(np.nanargmax(np.where(vol > 0, sharpe, -np.inf)))
+    order = np.argsort(vol)
+    return {
+        'weights': weights[order],
+        'return': ret[order],
+        'volatility': vol[order],
+        'sharpe': sharpe[order],
+        'min_variance': weights[min_var],
+        'max_sharpe': weights[max_sharpe],
+    }
+
+@perf.cache_data(max_entries=8)
+def _cached_frontier(version, n_points, risk_free, _mu, _cov):
+    return _frontier(_mu, _cov, n_points, risk_free)
+
+def frontier(mu, cov, n_points=FRONTIER_POINTS, risk_free=0.0):
+    """
+    efficient frontier แบบห้าม short: n_points จุด (เรียงตามความผันผวน) + น้ำหนัก min-variance / max-Sharpe
+    """
+    mu, cov = np.asarray(mu, dtype=float), np.asarray(cov, dtype=float)
+    return _cached_frontier(perf.fingerprint(mu, cov), n_points, risk_free, mu, cov)
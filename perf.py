@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import logging
+import functools
+import importlib
+import threading
+from collections import deque
+
+# ===========================
+# Import-time budget
+# ===========================
+# แต่ละหน้าถูก import ตอนเปิดครั้งแรก (lazy) จับเวลาไว้ ถ้าเกิน budget ให้เตือนใน log
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "1500"))
+import_times = {}
+
+log = logging.getLogger("wealth.perf")
+
+def record_import_time(name, elapsed_ms, budget_ms=None):
+    budget_ms = IMPORT_BUDGET_MS if budget_ms is None else budget_ms
+    import_times[name] = elapsed_ms
+    if elapsed_ms > budget_ms:
+        log.warning("import %s took %.0f ms (budget %.0f ms)", name, elapsed_ms, budget_ms)
+
+def timed_import(module_name, budget_ms=None):
+    """
+    import module (ครั้งแรกเท่านั้นที่เสียเวลาจริง) แล้วบันทึกเวลาไว้ใน import_times (ms)
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    t0 = time.perf_counter()
+    module = importlib.import_module(module_name)
+    record_import_time(module_name, (time.perf_counter() - t0) * 1000, budget_ms)
+    return module
+
+def lazy_page(module_name):
+    """
+    ฟังก์ชันสำหรับ st.Page ที่ import หน้า (views.xxx) ตอนถูกเปิดครั้งแรกแล้วเรียก show()
+    """
+    def run():
+        timed_import(module_name).show()
+    run.__name__ = module_name.rsplit(".", 1)[-1]
+    return run
+
+# ===========================
+# Loader / render instrumentation
+# ===========================
+# เก็บเวลา, จำนวนครั้งที่เรียก, cache hit/miss ของทุก loader / show() ไว้ใน process
+# ดูได้ที่ debug sidebar (?debug=1 หรือ WEALTH_DEBUG=1) และ export เป็น JSON lines
+MAX_EVENTS = 5000
+stats = {}
+events = deque(maxlen=MAX_EVENTS)
+_lock = threading.Lock()
+_local = threading.local()
+
+def record(name, elapsed_ms, cache=None):
+    """
+    บันทึกการเรียก 1 ครั้งลง stats / events (cache = "hit" / "miss" / None)
+    ใช้กับ cache ที่ไม่ได้ผ่าน cache_data เช่น chart_cache
+    """
+    with _lock:
+        s = stats.setdefault(name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "hits": 0, "misses": 0})
+        s["calls"] += 1
+        s["total_ms"] += elapsed_ms
+        s["max_ms"] = max(s["max_ms"], elapsed_ms)
+        if cache == "hit":
+            s["hits"] += 1
+        elif cache == "miss":
+            s["misses"] += 1
+        events.append({"ts": time.time(), "name": name, "ms": round(elapsed_ms, 3), "cache": cache})
+
+def _name_of(fn):
+    return f"{fn.__module__}.{fn.__qualname__}"
+
+def instrument(fn):
+    """
+    decorator จับเวลา + นับจำนวนครั้ง (ใช้กับฟังก์ชันที่ไม่ได้ cache เช่น show(), update_portfolio_hx)
+    """
+    name = _name_of(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(name, (time.perf_counter() - t0) * 1000)
+    return wrapper
+
+# table (ชื่อใน storage.TABLES) -> {ชื่อ loader: loader} ที่อ่าน table นั้น
+_dependents = {}
+
+def cache_data(tables=(), shared=False, **cache_kwargs):
+    """
+    ใช้แทน @st.cache_data(...) ได้เลย: cache เหมือนเดิม + จับเวลาและนับ cache hit/miss
+    (ถ้า body ของฟังก์ชันถูกรันจริง = miss, ไม่ถูกรัน = hit)
+    tables = ตารางที่ loader อ่าน -> เขียน/รีเฟรชตารางไหน ล้างเฉพาะ loader ที่อ่านตารางนั้น (invalidate)
+    shared=True -> ทุก rerun ได้ object เดียวกัน (st.cache_resource ไม่ต้อง unpickle สำเนาทุกครั้ง)
+                   ฟังก์ชันต้องคืน frame read-only (schema.load / schema.freeze)
+    """
+    import streamlit as st
+
+    def decorator(fn):
+        name = _name_of(fn)
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            _local.frames[-1]["miss"] = True
+            return fn(*args, **kwargs)
+
+        cached = (st.cache_resource if shared else st.cache_data)(**cache_kwargs)(body)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            frames = _local.__dict__.setdefault("frames", [])
+            frames.append({"miss": False})
+            t0 = time.perf_counter()
+            try:
+                return cached(*args, **kwargs)
+            finally:
+                frame = frames.pop()
+                record(name, (time.perf_counter() - t0) * 1000, "miss" if frame["miss"] else "hit")
+
+        wrapper.clear = cached.clear
+        for table in tables:
+            _dependents.setdefault(table, {})[name] = wrapper
+        return wrapper
+    return decorator
+
+def invalidate(table):
+    """
+    ล้าง cache เฉพาะ loader ที่ประกาศว่าอ่าน table นี้ (แทน st.cache_data.clear() ที่ล้างทุกหน้า)
+    """
+    loaders = list(_dependents.get(table, {}).values())
+    for loader in loaders:
+        loader.clear()
+    log.debug("invalidated %s: %s", table, [_name_of(l) for l in loaders])
+    return len(loaders)
+
+# ===========================
+# Content fingerprint
+# ===========================
+def fingerprint(*parts):
+    """
+    hash ของเนื้อหา (ใช้เป็น key ของ cache: ข้อมูลเปลี่ยน = fingerprint ใหม่)
+    DataFrame = ชื่อคอลัมน์ + index + ค่า (ราคาที่เก็บวันที่ไว้ใน index: เลื่อนช่วงวันที่ = key ใหม่)
+    numpy array = dtype + shape + bytes / None และค่าอื่น = repr
+    """
+    import hashlib
+    import numpy as np
+    import pandas as pd
+
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            h.update(",".join(map(str, part.columns)).encode())
+            h.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            h.update(f"{part.dtype}{part.shape}".encode())
+            h.update(part.tobytes())
+        else:
+            h.update(repr(part).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+def export_jsonl():
+    """
+    event ทั้งหมดเป็น JSON lines (1 บรรทัด = 1 การเรียก) สำหรับเอาไปวิเคราะห์ต่อ
+    """
+    with _lock:
+        rows = list(events)
+    return "\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + ("\n" if rows else "")
+
+def stats_frame():
+    import pandas as pd
+    with _lock:
+        rows = [{"name": k, **v} for k, v in stats.items()]
+    df = pd.DataFrame(rows, columns=["name", "calls", "total_ms", "max_ms", "hits", "misses"])
+    df["avg_ms"] = df["total_ms"] / df["calls"].where(df["calls"] > 0)
+    return df.sort_values("total_ms", ascending=False)
+
+def debug_enabled():
+    import streamlit as st
+    return os.environ.get("WEALTH_DEBUG", "") == "1" or st.query_params.get("debug") == "1"
+
+def render_debug_panel():
+    """
+    sidebar แสดงเวลาโหลด / render ของแต่ละฟังก์ชัน (เปิดด้วย ?debug=1)
+    """
+    import streamlit as st
+    if not debug_enabled():
+        return
+    with st.sidebar.expander("⏱️ Performance (debug)", expanded=False):
+        st.dataframe(
+            stats_frame(),
+            column_config={
+                "total_ms": st.column_config.NumberColumn(format="%.1f"),
+                "max_ms": st.column_config.NumberColumn(format="%.1f"),
+                "avg_ms": st.column_config.NumberColumn(format="%.1f"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        if import_times:
+            st.caption("Import time (ms)")
+            st.json({k: round(v, 1) for k, v in import_times.items()})
+        st.download_button("⬇️ Export JSONL", export_jsonl(), file_name="perf_events.jsonl", mime="application/json")
+        if st.button("Reset stats"):
+            with _lock:
+                stats.clear()
+                events.clear()
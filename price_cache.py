@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import pandas as pd
+from datetime import datetime, timedelta
+import perf
+
+# ===========================
+# Local price store (SQLite)
+# ===========================
+# เก็บราคาปิดรายวันไว้ในเครื่อง key = (ticker, date)
+# ตาราง coverage จำว่าเคยโหลดช่วงวันไหนมาแล้ว (วันหยุดไม่มีแท่งราคา เลยดูจากแท่งอย่างเดียวไม่ได้)
+CACHE_PATH = os.environ.get("PRICE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "prices.sqlite"))
+
+# PRICE_CACHE_OFFLINE=1 -> ห้ามโหลดเน็ต ใช้เฉพาะข้อมูลใน cache (เช่นตอนเทสกับ cache ที่ seed ไว้)
+OFFLINE = os.environ.get("PRICE_CACHE_OFFLINE", "") == "1"
+
+def _connect(path=None):
+    path = path or CACHE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE IF NOT EXISTS prices (ticker TEXT, date TEXT, close REAL, PRIMARY KEY (ticker, date))")
+    db.execute("CREATE TABLE IF NOT EXISTS coverage (ticker TEXT, start TEXT, end TEXT)")
+    return db
+
+def _day(value):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+def missing_ranges(intervals, start, end):
+    """
+    ช่วง [start, end) ที่ยังไม่มีใน intervals (list ของ (start, end) แบบ end ไม่รวม)
+    """
+    gaps = []
+    cursor = start
+    for s, e in sorted(intervals):
+        if e <= cursor:
+            continue
+        if s >= end:
+            break
+        if s > cursor:
+            gaps.append((cursor, min(s, end)))
+        cursor = max(cursor, e)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+def _coverage(db, ticker):
+    rows = db.execute("SELECT start, end FROM coverage WHERE ticker = ?", (ticker,)).fetchall()
+    return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in rows]
+
+def store_prices(close_df, start=None, end=None, path=None):
+    """
+    บันทึกราคาปิด (index = วันที่, columns = ticker) ลง cache และจำช่วง [start, end) ว่าโหลดครบแล้ว
+    ใช้ seed cache สำหรับเทส/offline ได้ด้วย
+    """
+    close_df = close_df.copy()
+    close_df.index = pd.DatetimeIndex([_day(d) for d in close_df.index])
+    start = _day(start) if start is not None else close_df.index.min()
+    end = _day(end) if end is not None else close_df.index.max() + timedelta(days=1)
+    # วันนี้ยังไม่ปิดตลาด -> ไม่นับว่าครบ รอบหน้าจะโหลดวันนี้ใหม่
+    end = min(end, _day(datetime.now()))
+
+    db = _connect(path)
+    with db:
+        for ticker in close_df.columns:
+            series = close_df[ticker].dropna()
+            db.executemany(
+                "INSERT OR REPLACE INTO prices (ticker, date, close) VALUES (?, ?, ?)",
+                [(ticker, d.strftime('%Y-%m-%d'), float(v)) for d, v in series.items()]
+            )
+            # โหลดแล้วไม่ได้อะไรเลย (เน็ตหลุด/วันหยุดล้วน) -> ไม่จำ coverage จะได้ลองใหม่รอบหน้า
+            if start < end and not series.empty:
+                db.execute(
+                    "INSERT INTO coverage (ticker, start, end) VALUES (?, ?, ?)",
+                    (ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+                )
+    db.close()
+
+@perf.instrument
+def _download_close(tickers, start, end):
+    import yfinance as yf # import ตอนต้องโหลดจริงเท่านั้น (yfinance import ช้า)
+    data = yf.download(tickers, start=start, end=end, progress=False)
+    if data is None or data.empty:
+        return pd.DataFrame(columns=tickers)
+    if isinstance(data.columns, pd.MultiIndex):
+        # แบบซับซ้อน (MultiIndex)
+        close = data['Close']
+    else:
+        # แบบธรรมดา (Single Index) -> มีแค่ ticker เดียว
+        close = data[['Close']].copy()
+        close.columns = tickers[:1]
+    close.index = close.index.tz_localize(None) if close.index.tz is not None else close.index
+    return close.reindex(columns=tickers)
+
+@perf.instrument
+def get_close_prices(tickers, start, end=None, path=None):
+    """
+    ราคาปิดรายวันของหลาย ticker (columns = ticker) ในช่วง [start, end)
+    โหลดจาก yfinance เฉพาะช่วงที่ยังไม่มีใน cache (รวบเป็น request เดียว) ที่เหลืออ่านจากดิสก์
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    start = _day(start)
+    end = _day(end) if end is not None else _day(datetime.now()) + timedelta(days=1)
+
+    db = _connect(path)
+    gaps = {t: missing_ranges(_coverage(db, t), start, end) for t in tickers}
+    db.close()
+
+    stale = [t for t in tickers if gaps[t]]
+    if stale and not OFFLINE:
+        # โหลดทีเดียวครอบทุกช่วงที่ขาด
+        fetch_start = min(g[0][0] for t, g in gaps.items() if g)
+        fetch_end = max(g[-1][1] for t, g in gaps.items() if g)
+        fresh = _download_close(stale, fetch_start, fetch_end)
+        store_prices(fresh, fetch_start, fetch_end, path=path)
+
+    db = _connect(path)
+    placeholders = ",".join("?" * len(tickers))
+    rows = pd.read_sql_query(
+        f"SELECT ticker, date, close FROM prices WHERE ticker IN ({placeholders}) AND date >= ? AND date < ?",
+        db, params=[*tickers, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')]
+    )
+    db.close()
+
+    close = rows.pivot(index='date', columns='ticker', values='close').reindex(columns=tickers)
+    close.index = pd.to_datetime(close.index)
+    close.index.name = 'Date'
+    return close.sort_index()
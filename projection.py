@@ -0,0 +1,174 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import perf
+import returns
+
+# ===========================
+# Monte Carlo wealth projection
+# ===========================
+# จำลองมูลค่าพอร์ตในอนาคตหลายหมื่น-แสนเส้นทาง แยกตามชั้นของ pyramid (Growth / Core / Foundation)
+# - แต่ละชั้นโตแบบ log-normal รายเดือน: log(1+r) ~ N(mu/12, sigma^2/12) สัมพันธ์กันตาม corr ระหว่างชั้น
+# - เงินเติมรายเดือนแบ่งเข้าแต่ละชั้นตาม Target(%) (ไม่ rebalance ส่วนที่มีอยู่แล้ว)
+# - ทุกเส้นทางคำนวณพร้อมกันเป็น array (ชั้น x paths) วนแค่ตามจำนวนเดือน
+# - paths เยอะ -> แบ่งเป็นก้อน (shard) ให้หลาย process ช่วยกันได้ (seed ของแต่ละก้อนแยกกันจาก SeedSequence)
+LAYERS = ["Growth", "Core", "Foundation"]
+
+# สมมติฐานตั้งต้นต่อปี (ผลตอบแทน log, ความผันผวน) ของชั้นที่ไม่มีประวัติใน Portfolio_Hx ให้ประมาณ
+DEFAULT_ASSUMPTIONS = {
+    "Growth": (0.08, 0.18),
+    "Core": (0.06, 0.10),
+    "Foundation": (0.025, 0.02),
+}
+
+# คำในคอลัมน์ Asset ของ pyramid -> ซีรีส์ใน Portfolio_Hx ที่ใช้ประมาณผลตอบแทน/ความผันผวน
+HISTORY_KEYWORDS = {"stock": "Stock", "fund": "Fund"}
+MIN_HISTORY_MONTHS = 12
+
+# เปอร์เซ็นไทล์ของ fan chart และจำนวนจุดสูงสุดบนแกนเวลา (เก็บทุก n เดือน ไม่ต้องเก็บทุกเดือนของทุกเส้นทาง)
+PERCENTILES = (5, 25, 50, 75, 95)
+MAX_SNAPSHOTS = 121
+
+# paths ตั้งแต่เท่านี้ขึ้นไปถึงจะแบ่งให้หลาย process (ต่ำกว่านี้ค่าเปิด process แพงกว่าที่ได้)
+POOL_MIN_PATHS = 50_000
+SHARD_PATHS = 25_000
+
+def monthly_log_returns(hx_df, trans=None):
+    """
+    ผลตอบแทน log รายเดือนของแต่ละซีรีส์ (จาก TWR สะสม -> ไม่นับเงินเติม) index = สิ้นเดือน
+    """
+    curve = returns.performance(hx_df, trans)['twr']
+    if curve.empty:
+        return pd.DataFrame()
+    growth = (1 + curve / 100).resample('ME').last()
+    return np.log(growth).diff().iloc[1:]
+
+def estimate_assumptions(pyramid_df, hx_df, trans=None):
+    """
+    (DataFrame ต่อชั้น: Return (%), Volatility (%), Target (%), Value / corr ระหว่างชั้น)
+    ชั้นที่ Asset มีคำตรงกับ HISTORY_KEYWORDS และมีประวัติ >= MIN_HISTORY_MONTHS เดือน ใช้ค่าจากประวัติ
+    ที่เหลือใช้ DEFAULT_ASSUMPTIONS
+    """
+    monthly = monthly_log_returns(hx_df, trans) if hx_df is not None and not hx_df.empty else pd.DataFrame()
+    rows, layer_series = [], {}
+    for layer in LAYERS:
+        match = pyramid_df[pyramid_df['Pyramid'].astype(str) == layer]
+        assets = str(match['Asset'].iloc[0]).lower() if not match.empty else ""
+        names = [s for kw, s in HISTORY_KEYWORDS.items() if kw in assets and s in monthly]
+        series = monthly[names].mean(axis=1).dropna() if names else pd.Series(dtype=float)
+        if len(series) >= MIN_HISTORY_MONTHS:
+            mu, sigma, source = series.mean() * 12, series.std(ddof=1) * np.sqrt(12), "history"
+            layer_series[layer] = series
+        else:
+            (mu, sigma), source = DEFAULT_ASSUMPTIONS[layer], "default"
+        rows.append({
+            'Layer': layer,
+            'Return (%)': mu * 100,
+            'Volatility (%)': sigma * 100,
+            'Target (%)': float(match['Target(%)'].iloc[0]) if not match.empty else np.nan,
+            'Value': float(match['Value'].iloc[0]) if not match.empty else 0.0,
+            'Source': source,
+        })
+
+    # corr ของชั้นที่มีประวัติทั้งคู่ (ช่วงเดือนที่ทับกัน) ชั้นที่ไม่มีประวัติถือว่าไม่สัมพันธ์กับชั้นอื่น
+    corr = np.eye(len(LAYERS))
+    for i, a in enumerate(LAYERS):
+        for j, b in enumerate(LAYERS[:i]):
+            if a in layer_series and b in layer_series:
+                pair = pd.concat([layer_series[a], layer_series[b]], axis=1, join='inner')
+                if len(pair) >= MIN_HISTORY_MONTHS:
+                    c = pair.corr().iloc[0, 1]
+                    corr[i, j] = corr[j, i] = 0.0 if np.isnan(c) else c
+    return pd.DataFrame(rows), corr
+
+def _factor(corr):
+    # corr = L L^T (ใช้ eigh แทน cholesky: ชั้นที่ใช้ประวัติชุดเดียวกัน corr = 1 ยังใช้ได้)
+    w, v = np.linalg.eigh(np.asarray(corr, dtype=float))
+    return v * np.sqrt(np.clip(w, 0, None))
+
+def _simulate_shard(seed, n_paths, start, monthly_add, mu, sigma, corr, months, every, target):
+    """
+    จำลอง n_paths เส้นทาง คืน (มูลค่ารวม ณ ทุก `every` เดือน [จุด x path] float32, เดือนแรกที่ถึงเป้า (-1 = ไม่ถึง))
+    """
+    rng = np.random.default_rng(seed)
+    n_layers = len(mu)
+    loading = _factor(corr).astype(np.float32)
+    independent = np.allclose(loading, np.eye(n_layers))
+    drift = (np.asarray(mu, dtype=np.float32) / 12)[:, None]
+    vol = (np.asarray(sigma, dtype=np.float32) / np.float32(np.sqrt(12)))[:, None]
+    # เก็บเป็น (ชั้น x path) float32 -> แต่ละชั้นเป็นแถวต่อเนื่องในหน่วยความจำ (ความละเอียด 7 หลักพอสำหรับประมาณการ)
+    wealth = np.repeat(np.asarray(start, dtype=np.float32)[:, None], n_paths, axis=1)
+    add = np.asarray(monthly_add, dtype=np.float32)[:, None]
+
+    snapshots = np.empty((months // every + 1, n_paths), dtype=np.float32)
+    snapshots[0] = wealth.sum(axis=0)
+    reached = np.where(snapshots[0] >= target, 0, -1).astype(np.int32)
+
+    # สุ่ม + exp ทีละหลายเดือน (ก้อนละ ~4M ค่า float32) เหลือในลูปแค่คูณ / บวกเงินเติม
+    # antithetic: สุ่มครึ่งเดียวแล้วใช้ทั้ง z และ -z (สุ่มน้อยลงครึ่งหนึ่ง + ค่าเฉลี่ยนิ่งขึ้น)
+    half = (n_paths + 1) // 2
+    block = max(1, min(months, (1 << 22) // max(1, n_layers * n_paths)))
+    for b0 in range(0, months, block):
+        nb = min(block, months - b0)
+        h = rng.standard_normal((nb, n_layers, half), dtype=np.float32)
+        z = np.concatenate([h, -h], axis=2)[:, :, :n_paths]
+        if not independent:
+            z = loading @ z
+        growth = np.exp(drift + vol * z, out=z)
+        for i in range(nb):
+            m = b0 + i + 1
+            wealth *= growth[i]
+            wealth += add
+            total = wealth.sum(axis=0)
+            reached[(reached < 0) & (total >= target)] = m
+            if m % every == 0:
+                snapshots[m // every] = total
+    return snapshots, reached
+
+def simulate(start, monthly_add, mu, sigma, corr, years, n_paths=10_000, target=np.inf, seed=0, workers=None):
+    """
+    start / monthly_add / mu / sigma = ค่าต่อชั้น (array ยาวเท่ากัน) mu, sigma ต่อปี (log)
+    workers: None = อัตโนมัติ (หลาย process เมื่อ n_paths >= POOL_MIN_PATHS) / 1 = process เดียว
+    คืน {'dates_m': เดือนของแต่ละจุด, 'percentiles': DataFrame (เดือน x เปอร์เซ็นไทล์),
+         'p_target': โอกาสถึงเป้าภายในแต่ละจุด, 'final': มูลค่ารวม ณ สิ้นสุดของทุกเส้นทาง}
+    """
+    months = int(years * 12)
+    every = max(1, int(np.ceil(months / (MAX_SNAPSHOTS - 1))))
+    months -= months % every
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, 4) if n_paths >= POOL_MIN_PATHS else 1
+    shards = [SHARD_PATHS] * (n_paths // SHARD_PATHS) + ([n_paths % SHARD_PATHS] if n_paths % SHARD_PATHS else [])
+    if workers <= 1:
+        shards = [n_paths]
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    args = [(s, n, start, monthly_add, mu, sigma, corr, months, every, target) for s, n in zip(seeds, shards)]
+
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_shard, *zip(*args)))
+    else:
+        parts = [_simulate_shard(*a) for a in args]
+
+    snapshots = np.concatenate([p[0] for p in parts], axis=1)
+    reached = np.concatenate([p[1] for p in parts])
+    steps = np.arange(snapshots.shape[0]) * every
+
+    pct = np.percentile(snapshots, PERCENTILES, axis=1).T
+    hit = np.sort(np.where(reached < 0, months + 1, reached))
+    p_target = hit.searchsorted(steps, side='right') / len(hit)
+    return {
+        'months': steps,
+        'percentiles': pd.DataFrame(pct, index=steps, columns=[f"P{q}" for q in PERCENTILES]),
+        'p_target': pd.Series(p_target, index=steps),
+        'final': snapshots[-1],
+    }
+
+@perf.cache_data(max_entries=8)
+def project(start, monthly_add, mu, sigma, corr, years, n_paths=10_000, target=np.inf, seed=0):
+    """
+    simulate() แบบ cache (input เป็น tuple / ตัวเลข -> hash ได้ เปลี่ยน slider กลับไปค่าเดิมไม่ต้องคำนวณใหม่)
+    """
+    return simulate(np.array(start), np.array(monthly_add), np.array(mu), np.array(sigma),
+                    np.array(corr), years, n_paths=n_paths, target=target, seed=seed)
@@ -0,0 +1,123 @@
+import re
+import numpy as np
+import pandas as pd
+
+# ===========================
+# Pyramid rebalancing planner
+# ===========================
+# หาเงินซื้อ/ขายของแต่ละสินทรัพย์ที่น้อยที่สุด ที่ทำให้ทุกชั้นของ pyramid อยู่ในช่วง Target(%) ± tolerance
+# 1. จับคู่สินทรัพย์ใน rebalance กับชั้น: ชื่อสินทรัพย์ (ไม่รวม emoji) ตรงกับชื่อในคอลัมน์ Asset ของชั้นนั้น
+# 2. คำนวณระดับชั้น (ยอดซื้อขายรวมน้อยที่สุด) แล้วแบ่งให้สินทรัพย์ในชั้นตามสัดส่วนมูลค่า (สัดส่วนในชั้นเหมือนเดิม)
+# - ซื้อขายได้ : เริ่มจากเลื่อนแต่ละชั้นเข้าขอบช่วงที่ใกล้ที่สุด แล้วปรับส่วนต่างให้รวมเท่ายอดใหม่ (ชั้นที่ห่างเป้าที่สุดก่อน)
+# - เงินใหม่อย่างเดียว : ไม่ขาย เติมเงินให้ชั้นที่ต่ำกว่าเป้ามากที่สุดก่อน (water-filling)
+# ชั้นมีแค่ไม่กี่ชั้น -> คำนวณใหม่ได้ทุกครั้งที่ลาก slider (ไม่ต้อง cache)
+
+def asset_key(name):
+    """
+    ชื่อสินทรัพย์แบบเทียบได้: ตัด emoji / สัญลักษณ์นำหน้า + ตัวพิมพ์เล็ก ('🚀 US stock' -> 'us stock')
+    """
+    return re.sub(r"^[^\w]+", "", str(name)).strip().lower()
+
+def map_layers(assets_df, pyramid_df):
+    """
+    holdings (Asset, Layer, Value) ของสินทรัพย์ที่อยู่ในชั้นใดชั้นหนึ่งของ pyramid
+    สินทรัพย์ที่ชื่ออยู่หลายชั้นนับเป็นชั้นแรก / ไม่อยู่ในชั้นไหนไม่ถูกนำมาคิด
+    """
+    layer_of = {}
+    for layer, listed in zip(pyramid_df['Pyramid'].astype(str), pyramid_df['Asset']):
+        if pd.isna(listed):
+            continue
+        for token in str(listed).split(','):
+            layer_of.setdefault(asset_key(token), layer)
+
+    names = assets_df['AssetName'].astype(str)
+    keys = names.map(asset_key)
+    layers = keys.map(layer_of)
+    keep = layers.notna() & assets_df['Value'].notna()
+    return pd.DataFrame({
+        'Asset': names[keep].to_numpy(),
+        'Layer': layers[keep].to_numpy(),
+        'Value': assets_df['Value'][keep].to_numpy(dtype=float),
+    })
+
+def _fill(values, lo, hi, amount, priority):
+    """
+    เพิ่ม (amount > 0) หรือลด (amount < 0) ผลรวมของ values ทีละชั้นตามลำดับ priority โดยไม่เกินช่วง [lo, hi]
+    """
+    values = values.copy()
+    for i in priority:
+        if amount == 0:
+            break
+        room = (hi[i] - values[i]) if amount > 0 else (lo[i] - values[i])
+        step = min(amount, room) if amount > 0 else max(amount, room)
+        values[i] += step
+        amount -= step
+    return values
+
+def plan_layers(current, target, tolerance, cash=0.0, new_cash_only=False):
+    """
+    มูลค่าหลังปรับของแต่ละชั้น (array) + ทุกชั้นอยู่ในช่วงหรือไม่
+    current = มูลค่าปัจจุบันต่อชั้น, target = สัดส่วนเป้าหมาย (รวม = 1), tolerance = ช่วงที่ยอมได้ (เช่น 0.05 = ±5pp)
+    cash = เงินใหม่ที่ลงเพิ่ม (ลงทั้งหมด)
+    """
+    current = np.asarray(current, dtype=float)
+    target = np.asarray(target, dtype=float)
+    total = current.sum() + cash
+    lo = np.clip(target - tolerance, 0, 1) * total
+    hi = np.clip(target + tolerance, 0, 1) * total
+    goal = target * total
+
+    if new_cash_only:
+        # water-filling: หา level k ที่ sum(max(0, k * target - current)) = cash -> ชั้นที่ต่ำกว่าเป้ามากได้เงินก่อน
+        after = current.copy()
+        if cash > 0 and target.sum() > 0:
+            funded = np.flatnonzero(target > 0)
+            order = funded[np.argsort(current[funded] / target[funded])]
+            ratio = current[order] / target[order]
+            for n in range(1, len(order) + 1):
+                idx = order[:n]
+                k = (cash + current[idx].sum()) / target[idx].sum()
+                if n == len(order) or k <= ratio[n]:
+                    after[idx] = k * target[idx]
+                    break
+    else:
+        # แต่ละชั้นเข้าขอบช่วงที่ใกล้ที่สุด (ซื้อขายน้อยสุดต่อชั้น) แล้วเกลี่ยส่วนต่างให้ผลรวม = total
+        # ชั้นที่ถูกเลื่อนอยู่ที่ขอบแล้ว ส่วนต่างจึงตกกับชั้นที่ยังอยู่ในช่วง: ซื้อให้ชั้นที่ต่ำกว่าเป้ามากสุด / ขายชั้นที่เกินเป้ามากสุดก่อน
+        after = np.clip(current, lo, hi)
+        residual = total - after.sum()
+        gap = after - goal
+        after = _fill(after, lo, hi, residual, np.argsort(gap if residual > 0 else -gap))
+
+    in_band = bool(np.all((after >= lo - 1e-6) & (after <= hi + 1e-6)))
+    return after, in_band
+
+def plan(holdings, targets, tolerance=0.05, cash=0.0, new_cash_only=False):
+    """
+    holdings = map_layers(...) / targets = {ชั้น: Target(%) หน่วย %}
+    คืน (trades: ต่อสินทรัพย์ Asset, Layer, Value, Trade, After / layers: ต่อชั้น Actual, Target, After (%), Trade, In band / ทุกชั้นอยู่ในช่วงไหม)
+    """
+    layers = [l for l in targets if l in set(holdings['Layer'])]
+    current = holdings.groupby('Layer', sort=False)['Value'].sum().reindex(layers).to_numpy(dtype=float)
+    goal = np.array([targets[l] for l in layers], dtype=float)
+    goal = goal / goal.sum() if goal.sum() > 0 else np.full(len(layers), 1 / max(1, len(layers)))
+
+    after, in_band = plan_layers(current, goal, tolerance, cash, new_cash_only)
+    layer_trade = dict(zip(layers, after - current))
+
+    # แบ่งยอดของชั้นให้สินทรัพย์ตามสัดส่วนมูลค่า (ชั้นที่ยังไม่มีมูลค่า แบ่งเท่ากัน)
+    layer_value = holdings.groupby('Layer', sort=False)['Value'].transform('sum').to_numpy(dtype=float)
+    layer_count = holdings.groupby('Layer', sort=False)['Value'].transform('size').to_numpy(dtype=float)
+    share = np.where(layer_value > 0, holdings['Value'].to_numpy(dtype=float) / np.where(layer_value > 0, layer_value, 1), 1 / layer_count)
+    trade = holdings['Layer'].map(layer_trade).fillna(0).to_numpy(dtype=float) * share
+
+    trades = holdings.assign(Trade=trade, After=holdings['Value'] + trade)
+    total = after.sum()
+    summary = pd.DataFrame({
+        'Layer': layers,
+        'Actual (%)': current / current.sum() * 100 if current.sum() > 0 else 0.0,
+        'Target (%)': goal * 100,
+        'After (%)': after / total * 100 if total > 0 else 0.0,
+        'Trade': after - current,
+    })
+    summary['In band'] = (summary['After (%)'] - summary['Target (%)']).abs() <= tolerance * 100 + 1e-6
+    return trades, summary, in_band
@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+import perf
+import utils
+
+# ===========================
+# Cash-flow-aware returns (TWR / XIRR)
+# ===========================
+# (value - first) / first นับเงินที่เติมเข้าไปเป็นกำไร -> ใช้ไม่ได้เมื่อซื้อเพิ่มทุกเดือน
+# - TWR  (time-weighted)  : ผลตอบแทนของการเลือกสินทรัพย์ ไม่ขึ้นกับจังหวะเติมเงิน (ใช้เทียบกับ benchmark)
+#                           แต่ละช่วงระหว่างแถวใน Portfolio_Hx ใช้ Modified Dietz (ถ่วงน้ำหนักตามวันที่เงินเข้า) แล้วคูณต่อกัน
+# - XIRR (money-weighted) : ผลตอบแทนต่อปีที่เงินของเราได้จริง (นับจังหวะเติมเงินด้วย)
+# กระแสเงินสด: หุ้น US = Buying track (Total Value ($) ซื้อ +, ขาย -) / กองทุน, รวม = ส่วนต่างของ Cost ในแต่ละแถว
+DAYS_PER_YEAR = 365.0
+
+# ชื่อซีรีส์: (คอลัมน์มูลค่า, คอลัมน์ต้นทุน)
+SERIES = {
+    'Stock': ('My_Stock_Value', 'My_Stock_Cost'),
+    'Fund': ('My_Fund_Value', 'My_Fund_Cost'),
+    'Total': ('My_Total_Value', 'My_Total_Cost'),
+}
+
+def history_version(*frames):
+    """
+    hash ของเนื้อหา frame (ใช้เป็น key ของ cache: ข้อมูลเปลี่ยน = version ใหม่)
+    """
+    return perf.fingerprint(*frames)
+
+def ledger_flows(trans, buys_only=False):
+    """
+    (วันที่, จำนวนเงิน $) จาก Buying track: ซื้อ = เงินเข้าพอร์ต (+), ขาย = เงินออก (-)
+    """
+    if trans is None or trans.empty:
+        return pd.DatetimeIndex([]), np.array([])
+    side = trans['Buy/Sell'].astype(str)
+    keep = side == 'Buy' if buys_only else side.isin(['Buy', 'Sell'])
+    amount = pd.to_numeric(trans['Total Value ($)'], errors='coerce').to_numpy(dtype=float)
+    amount = np.where(side == 'Sell', -amount, amount)
+    keep = keep.to_numpy() & ~np.isnan(amount)
+    return pd.DatetimeIndex(pd.to_datetime(trans['Date']))[keep], amount[keep]
+
+def bucket_flows(dates, flow_dates, flow_amounts):
+    """
+    รวมเงินเข้า/ออกของแต่ละช่วง (dates[i-1], dates[i]] ไว้ที่แถว i (ก่อนแถวแรก/หลังแถวสุดท้ายไม่นับ)
+    คืน (เงินรวม, เงินรวมคูณน้ำหนักเวลา) น้ำหนัก = สัดส่วนของช่วงที่เงินก้อนนั้นอยู่ในพอร์ต (ซื้อวันที่ของแถว = 0)
+    """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    flow_dates = np.asarray(flow_dates, dtype='datetime64[ns]')
+    flow_amounts = np.asarray(flow_amounts, dtype=float)
+    pos = dates.searchsorted(flow_dates, side='left')
+    inside = (pos > 0) & (pos < len(dates))
+    pos, amounts = pos[inside], flow_amounts[inside]
+    gap = (dates[pos] - dates[pos - 1]).astype('int64')
+    weight = (dates[pos] - flow_dates[inside]).astype('int64') / gap
+    flows = np.bincount(pos, weights=amounts, minlength=len(dates))[:len(dates)]
+    weighted = np.bincount(pos, weights=amounts * weight, minlength=len(dates))[:len(dates)]
+    return flows, weighted
+
+def spread_weights(dates):
+    """
+    น้ำหนักเวลาของเงินที่รู้แค่ว่าเข้าระหว่างสองแถว (เช่นส่วนต่าง Cost): สมมติว่ากระจายเท่าๆ กันทุกวันในช่วง
+    แถวรายวัน -> 0 (ซื้อวันนั้นราคาวันนั้น) / ช่วงยาว -> เข้าใกล้ 1/2
+    """
+    days = np.diff(np.asarray(dates, dtype='datetime64[D]')).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = np.where(days > 0, (days - 1) / (2 * days), 0.0)
+    return np.concatenate([[0.0], w])
+
+def twr_series(values, flows, weighted=None):
+    """
+    TWR สะสม (เท่าของ 1) ณ แต่ละแถว: ช่วงย่อยใช้ Modified Dietz
+    r_i = (V_i - V_{i-1} - F_i) / (V_{i-1} + sum(w * F))   (ไม่ให้ weighted มา = เงินเข้ากลางช่วง)
+    """
+    values = np.asarray(values, dtype=float)
+    flows = np.asarray(flows, dtype=float)
+    weighted = flows / 2 if weighted is None else np.asarray(weighted, dtype=float)
+    prev = values[:-1]
+    denom = prev + weighted[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (values[1:] - prev - flows[1:]) / denom
+    r = np.where(np.isfinite(r) & (denom > 0), r, 0.0)
+    return np.concatenate([[1.0], np.cumprod(1 + r)])
+
+def _npv(rate, t, cf):
+    return np.sum(cf * (1 + rate) ** -t)
+
+def _brent(f, a, b, tol=1e-12, max_iter=100):
+    # Brent's method (bisection + secant + inverse quadratic) ต้องมี f(a), f(b) คนละเครื่องหมาย
+    fa, fb = f(a), f(b)
+    if abs(fa) < abs(fb):
+        a, b, fa, fb = b, a, fb, fa
+    c, fc, d, bisected = a, fa, a, True
+    for _ in range(max_iter):
+        if fb == 0 or abs(b - a) < tol:
+            return b
+        if fa != fc and fb != fc:
+            s = (a * fb * fc / ((fa - fb) * (fa - fc)) + b * fa * fc / ((fb - fa) * (fb - fc))
+                 + c * fa * fb / ((fc - fa) * (fc - fb)))
+        else:
+            s = b - fb * (b - a) / (fb - fa)
+        if (not (min((3 * a + b) / 4, b) < s < max((3 * a + b) / 4, b))
+                or (bisected and abs(s - b) >= abs(b - c) / 2)
+                or (not bisected and abs(s - b) >= abs(c - d) / 2)):
+            s, bisected = (a + b) / 2, True
+        else:
+            bisected = False
+        fs = f(s)
+        d, c, fc = c, b, fb
+        if fa * fs < 0:
+            b, fb = s, fs
+        else:
+            a, fa = s, fs
+        if abs(fa) < abs(fb):
+            a, b, fa, fb = b, a, fb, fa
+    return b
+
+def xirr(dates, cashflows, guess=0.1, tol=1e-10, max_iter=50):
+    """
+    อัตราผลตอบแทนต่อปีที่ทำให้ NPV ของกระแสเงินสด = 0 (เงินออกจากกระเป๋า = ลบ, ได้คืน = บวก)
+    Newton ก่อน (เร็ว ปกติ < 10 รอบ) ถ้าไม่ลู่เข้าค่อยใช้ Brent ในช่วงที่ NPV เปลี่ยนเครื่องหมาย
+    หาไม่ได้ -> NaN
+    """
+    dates = pd.DatetimeIndex(dates)
+    cf = np.asarray(cashflows, dtype=float)
+    if len(cf) < 2 or not (cf > 0).any() or not (cf < 0).any():
+        return np.nan
+    t = (dates - dates.min()).days.to_numpy() / DAYS_PER_YEAR
+
+    rate = guess
+    for _ in range(max_iter):
+        disc = (1 + rate) ** -t
+        f = np.sum(cf * disc)
+        df = np.sum(-t * cf * disc / (1 + rate))
+        if df == 0 or not np.isfinite(df):
+            break
+        step = f / df
+        rate -= step
+        if rate <= -1 or not np.isfinite(rate):
+            break
+        if abs(step) < tol:
+            return rate
+
+    lo, hi = -0.9999, 10.0
+    f = lambda r: _npv(r, t, cf)
+    if f(lo) * f(hi) > 0:
+        return np.nan
+    return _brent(f, lo, hi)
+
+def _series_returns(dates, values, flows, weighted, flow_dates=None, flow_amounts=None):
+    """
+    TWR สะสม + XIRR ของซีรีส์เดียว (แถวที่มูลค่าว่างถูกข้าม)
+    flows / weighted = เงินเข้า/ออกต่อแถว / ถ้ามี flow_dates ใช้วันที่จริงของแต่ละรายการใน XIRR
+    """
+    twr = twr_series(values, flows, weighted)
+    cf_dates = [dates[0]]
+    cf = [-values[0]]
+    if flow_dates is not None:
+        inside = (flow_dates > dates[0]) & (flow_dates <= dates[-1])
+        cf_dates += list(flow_dates[inside])
+        cf += list(-flow_amounts[inside])
+    else:
+        cf_dates += list(dates[1:])
+        cf += list(-flows[1:])
+    cf_dates.append(dates[-1])
+    cf.append(values[-1])
+    return twr, xirr(cf_dates, cf)
+
+def _performance(hx_df, trans):
+    hx = hx_df.copy()
+    hx['Date'] = pd.to_datetime(hx['Date'], errors='coerce')
+    hx = hx.dropna(subset=['Date']).sort_values('Date', kind='stable')
+    # วันเดียวกันอัปเดตซ้ำ (กด update หลายครั้ง) -> ใช้แถวล่าสุด ทุกซีรีส์ต้องมีวันที่ไม่ซ้ำก่อนรวมเป็นตารางเดียว
+    hx = hx.drop_duplicates('Date', keep='last')
+
+    stock_dates, stock_amounts = ledger_flows(trans)
+    buy_dates, buy_amounts = ledger_flows(trans, buys_only=True)
+
+    specs = []
+    for name, (value_col, cost_col) in SERIES.items():
+        if value_col in hx.columns:
+            ledger = (stock_dates, stock_amounts) if name == 'Stock' and trans is not None else None
+            specs.append((name, value_col, cost_col, ledger))
+    for ticker, label in utils.BENCHMARKS.items():
+        value_col = utils.benchmark_columns(ticker)[0]
+        if value_col in hx.columns:
+            # benchmark จำลองซื้อด้วยรายการ Buy เท่านั้น (เหมือน update_portfolio_hx)
+            specs.append((label, value_col, None, (buy_dates, buy_amounts)))
+
+    curves, rows = {}, []
+    for name, value_col, cost_col, ledger in specs:
+        valid = hx[value_col].notna().to_numpy() & (pd.to_numeric(hx[value_col], errors='coerce') > 0).to_numpy()
+        if valid.sum() < 2:
+            continue
+        part = hx.loc[valid]
+        dates = pd.DatetimeIndex(part['Date'])
+        values = part[value_col].to_numpy(dtype=float)
+        if ledger is not None:
+            flows, weighted = bucket_flows(dates, *ledger)
+            twr, irr = _series_returns(dates, values, flows, weighted, *ledger)
+        else:
+            cost = part[cost_col].ffill().fillna(0).to_numpy(dtype=float)
+            flows = np.concatenate([[0.0], np.diff(cost)])
+            twr, irr = _series_returns(dates, values, flows, flows * spread_weights(dates))
+
+        days = (dates[-1] - dates[0]).days
+        total = twr[-1] - 1
+        curves[name] = pd.Series((twr - 1) * 100, index=dates)
+        rows.append({
+            'Series': name,
+            'TWR (%)': total * 100,
+            'TWR p.a. (%)': ((1 + total) ** (DAYS_PER_YEAR / days) - 1) * 100 if days >= DAYS_PER_YEAR else np.nan,
+            'XIRR (%)': irr * 100,
+            'Simple (%)': (values[-1] / values[0] - 1) * 100,
+            'Days': days,
+        })
+
+    summary = pd.DataFrame(rows, columns=['Series', 'TWR (%)', 'TWR p.a. (%)', 'XIRR (%)', 'Simple (%)', 'Days'])
+    twr_df = pd.DataFrame(curves)
+    twr_df.index.name = 'Date'
+    return {'twr': twr_df, 'summary': summary}
+
+@perf.cache_data(max_entries=16)
+def _cached_performance(version, _hx_df, _trans):
+    return _performance(_hx_df, _trans)
+
+def performance(hx_df, trans=None):
+    """
+    ผลตอบแทนของทุกซีรีส์ใน Portfolio_Hx (Stock / Fund / Total + benchmark ที่มีคอลัมน์)
+    คืน {'twr': TWR สะสม (%) รายแถว, 'summary': TWR, TWR ต่อปี, XIRR, แบบเดิม (value-first)/first}
+    cache ตาม history_version -> Portfolio_Hx / transaction เปลี่ยนเมื่อไหร่ค่อยคำนวณใหม่
+    """
+    return _cached_performance(history_version(hx_df, trans), hx_df, trans)
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import perf
+import returns
+import utils
+
+# ===========================
+# Rolling risk analytics
+# ===========================
+# ความเสี่ยงของพอร์ตจากผลตอบแทนรายแถวของ TWR (returns.performance -> เงินเติมไม่ถูกนับเป็นความผันผวน)
+# เทียบกับราคา benchmark จาก price_cache (ราคา ณ วันที่ของแต่ละแถวใน Portfolio_Hx)
+# ทุก rolling ใช้ผลรวมสะสม (cumsum) -> O(n) ไม่ว่าหน้าต่างจะยาวแค่ไหน
+# ยกเว้น max drawdown ในหน้าต่าง ที่ต้องดูทุกจุดในหน้าต่าง -> sliding window ทีละก้อน (จำกัดหน่วยความจำ)
+DAYS_PER_YEAR = 365.25
+
+# หน้าต่างที่เลือกได้ (ชื่อ: จำนวนวันตามปฏิทิน) แปลงเป็นจำนวนแถวตามระยะห่างปกติของ Portfolio_Hx
+WINDOWS = {'3M': 91, '6M': 182, '1Y': 365, '3Y': 1095}
+
+# ผลตอบแทนไร้ความเสี่ยงต่อปี (ใช้ใน Sharpe / Sortino)
+RISK_FREE_RATE = 0.0
+
+# จำนวนหน้าต่างที่คำนวณ drawdown พร้อมกันต่อก้อน (ก้อนละ ~CHUNK x ความยาวหน้าต่าง float)
+DRAWDOWN_CHUNK = 1024
+
+METRICS = ['Volatility (%)', 'Max Drawdown (%)', 'Beta', 'Correlation', 'Sharpe', 'Sortino']
+
+def window_rows(dates, days):
+    """
+    จำนวนแถวที่ครอบ `days` วัน (Portfolio_Hx ไม่ได้มีทุกวัน -> ใช้ระยะห่างกลาง (median) ระหว่างแถว)
+    """
+    gaps = np.diff(np.asarray(dates, dtype='datetime64[D]')).astype(float)
+    gap = np.median(gaps[gaps > 0]) if (gaps > 0).any() else 1.0
+    return max(5, int(round(days / gap)))
+
+def rolling_sum(x, n):
+    """
+    ผลรวมของ n ค่าล่าสุด ณ แต่ละตำแหน่ง (n-1 ตำแหน่งแรกเป็น NaN)
+    """
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1:] = c[n:] - c[:-n]
+    return out
+
+def drawdown(wealth):
+    """
+    ระยะห่างจากจุดสูงสุดเดิม (0 = ทำ high ใหม่, -0.2 = ต่ำกว่า high 20%)
+    """
+    wealth = np.asarray(wealth, dtype=float)
+    return wealth / np.maximum.accumulate(wealth) - 1
+
+def rolling_max_drawdown(wealth, n, chunk=DRAWDOWN_CHUNK):
+    """
+    max drawdown ภายในหน้าต่าง n แถวล่าสุด ณ แต่ละตำแหน่ง (peak ต้องอยู่ในหน้าต่างเดียวกัน)
+    """
+    wealth = np.asarray(wealth, dtype=float)
+    out = np.full(len(wealth), np.nan)
+    if len(wealth) < n:
+        return out
+    windows = sliding_window_view(wealth, n)
+    for i in range(0, len(windows), chunk):
+        block = windows[i:i + chunk]
+        out[n - 1 + i:n - 1 + i + len(block)] = (block / np.maximum.accumulate(block, axis=1) - 1).min(axis=1)
+    return out
+
+def _analyze(hx_df, trans, prices, series, ticker, days):
+    empty = {'rolling': pd.DataFrame(columns=METRICS), 'drawdown': pd.Series(dtype=float), 'summary': {}}
+    # ผลตอบแทนรายแถวจาก TWR สะสม (หักเงินเติมแล้ว)
+    curve = returns.performance(hx_df, trans)['twr']
+    if series not in curve or curve[series].notna().sum() < 3:
+        return empty
+    twr = curve[series].dropna()
+    wealth_dates = twr.index
+    dates = wealth_dates[1:]
+    growth = 1 + twr.to_numpy(dtype=float) / 100
+    p = growth[1:] / growth[:-1] - 1
+
+    # ราคา benchmark ณ วันที่ของแถวก่อนหน้าและแถวนี้ (ช่วงเดียวกับผลตอบแทนของพอร์ต)
+    if prices is not None and ticker in prices and prices[ticker].notna().any():
+        px_at = utils.asof_prices(prices[ticker].dropna(), wealth_dates)
+        b = px_at[1:] / px_at[:-1] - 1
+    else:
+        b = np.full(len(p), np.nan)
+
+    # ผลตอบแทนส่วนเกิน rf ตามจำนวนวันของแต่ละช่วง
+    gap_days = np.diff(np.asarray(wealth_dates, dtype='datetime64[D]')).astype(float)
+    excess = p - RISK_FREE_RATE * gap_days / DAYS_PER_YEAR
+
+    n = min(window_rows(wealth_dates, days), len(p))
+    # แถวต่อปีจริงในแต่ละหน้าต่าง (Portfolio_Hx มีวันเว้นได้)
+    span_days = rolling_sum(gap_days, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_year = n / (span_days / DAYS_PER_YEAR)
+
+        s1, s2 = rolling_sum(p, n), rolling_sum(p * p, n)
+        var_p = (s2 - s1 * s1 / n) / (n - 1)
+        vol = np.sqrt(np.maximum(var_p, 0) * per_year)
+
+        mean_ex = rolling_sum(excess, n) / n
+        sharpe = mean_ex / np.sqrt(np.maximum(var_p, 0)) * np.sqrt(per_year)
+        downside = np.sqrt(rolling_sum(np.minimum(excess, 0) ** 2, n) / n)
+        sortino = mean_ex / downside * np.sqrt(per_year)
+
+        # beta / correlation เฉพาะแถวที่มีราคา benchmark ทั้งสองฝั่ง
+        ok = np.isfinite(b)
+        pb, bb = np.where(ok, p, 0.0), np.where(ok, b, 0.0)
+        k = rolling_sum(ok.astype(float), n)
+        sp, sb = rolling_sum(pb, n), rolling_sum(bb, n)
+        cov = (rolling_sum(pb * bb, n) - sp * sb / k) / (k - 1)
+        var_pk = (rolling_sum(pb * pb, n) - sp * sp / k) / (k - 1)
+        var_b = (rolling_sum(bb * bb, n) - sb * sb / k) / (k - 1)
+        beta = np.where(k >= n / 2, cov / var_b, np.nan)
+        corr = np.where(k >= n / 2, cov / np.sqrt(var_pk * var_b), np.nan)
+
+    wealth = np.concatenate([[1.0], np.cumprod(1 + p)])
+    rolling = pd.DataFrame({
+        'Volatility (%)': vol * 100,
+        'Max Drawdown (%)': rolling_max_drawdown(wealth, n + 1)[1:] * 100,
+        'Beta': beta,
+        'Correlation': corr,
+        'Sharpe': sharpe,
+        'Sortino': sortino,
+    }, index=dates).replace([np.inf, -np.inf], np.nan)
+
+    # ทั้งช่วง
+    years = gap_days.sum() / DAYS_PER_YEAR
+    full_per_year = len(p) / years if years > 0 else np.nan
+    full_sd = p.std(ddof=1)
+    full_down = np.sqrt(np.mean(np.minimum(excess, 0) ** 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary = {
+            'Volatility (%)': full_sd * np.sqrt(full_per_year) * 100,
+            'Max Drawdown (%)': drawdown(wealth).min() * 100,
+            'Beta': np.cov(p[ok], b[ok])[0, 1] / b[ok].var(ddof=1) if ok.sum() > 2 else np.nan,
+            'Correlation': np.corrcoef(p[ok], b[ok])[0, 1] if ok.sum() > 2 else np.nan,
+            'Sharpe': excess.mean() / full_sd * np.sqrt(full_per_year),
+            'Sortino': excess.mean() / full_down * np.sqrt(full_per_year),
+        }
+    underwater = pd.Series(drawdown(wealth) * 100, index=wealth_dates, name='Drawdown (%)')
+    return {'rolling': rolling, 'drawdown': underwater, 'summary': summary}
+
+@perf.cache_data(max_entries=32)
+def _cached_analyze(version, series, ticker, days, _hx_df, _trans, _prices):
+    return _analyze(_hx_df, _trans, _prices, series, ticker, days)
+
+def analyze(hx_df, trans, prices, series='Total', ticker='SPY', window='1Y'):
+    """
+    rolling volatility / max drawdown / beta / correlation / Sharpe / Sortino ของซีรีส์ใน Portfolio_Hx
+    prices = ราคาปิด benchmark (columns = ticker) จาก price_cache
+    คืน {'rolling': DataFrame รายแถว, 'drawdown': % ต่ำกว่าจุดสูงสุด, 'summary': ค่าของทั้งช่วง}
+    cache ตาม hash ของข้อมูล + series / ticker / หน้าต่าง
+    """
+    version = returns.history_version(hx_df, trans, prices)
+    return _cached_analyze(version, series, ticker, WINDOWS[window], hx_df, trans, prices)
@@ -0,0 +1,125 @@
+import pandas as pd
+import storage
+
+# ===========================
+# Typed schemas
+# ===========================
+# ประกาศชนิดข้อมูลของแต่ละตาราง แล้วแปลงครั้งเดียวตอนโหลด (หน้าไม่ต้อง parse / คูณ 100 เองทุกรอบ render)
+# - money    : ตัวเลขเงิน (ตัด ',' ออกก่อน) เก็บ float64 ให้เศษสตางค์ยังตรง
+# - ratio    : สัดส่วน 0-1 ตามที่อยู่ในชีท -> float32
+# - percent  : สัดส่วน 0-1 ในชีท -> คูณ 100 เป็นหน่วย % -> float32
+# - category : ชื่อ/ประเภทที่ซ้ำกันเยอะ -> categorical
+# - date     : datetime64
+# - text     : ไม่แปลง
+# คอลัมน์ที่ไม่ได้ประกาศคงไว้ตามเดิม ('*' = ชนิดของคอลัมน์ที่เหลือทั้งหมด)
+SCHEMAS = {
+    "assets": {
+        "AssetName": "category", "Invest": "money", "Value": "money",
+        "GainLoss_Text": "text", "Portion": "ratio",
+    },
+    "pyramid": {
+        "Pyramid": "category", "Asset": "text", "Invest": "money", "Value": "money",
+        "GainLoss": "percent", "Portion (%)": "percent", "Target(%)": "percent",
+    },
+    "us_stocks": {
+        "US stock": "category", "Type": "category", "Invest": "money", "Value": "money",
+        "Profit/loss": "money", "%": "ratio", "Portion": "ratio",
+    },
+    "transactions": {
+        "Date": "date", "Ticker": "category", "Buy/Sell": "category",
+        "Total Value ($)": "money", "Net Value (THB)": "money",
+    },
+    "fund_summary": {
+        "Name": "category", "Invest": "money", "Value": "money", "P/L": "money",
+        "%": "percent", "Portion": "percent",
+    },
+    "fund_history": {
+        "Date": "date", "Name": "category", "%": "percent",
+    },
+    "portfolio_hx": {
+        "Date": "date", "*": "money",
+    },
+}
+
+def _number(col):
+    if pd.api.types.is_numeric_dtype(col):
+        return col
+    return pd.to_numeric(col.astype(str).str.replace(',', '', regex=False), errors='coerce')
+
+def _coerce(col, kind):
+    if kind == "money":
+        return _number(col).astype("float64")
+    if kind == "ratio":
+        return _number(col).astype("float32")
+    if kind == "percent":
+        return (_number(col) * 100).astype("float32")
+    if kind == "category":
+        return col.astype("category")
+    if kind == "date":
+        return pd.to_datetime(col, errors='coerce')
+    return col
+
+def apply(table, df):
+    """
+    แปลงทุกคอลัมน์ตาม SCHEMAS[table] ในรอบเดียว (สร้าง frame ใหม่ทีเดียว ไม่ assign ทีละคอลัมน์)
+    """
+    spec = SCHEMAS[table]
+    default = spec.get("*", "text")
+    return pd.DataFrame({c: _coerce(df[c], spec.get(c, default)) for c in df.columns}, index=df.index)
+
+# ===========================
+# Read-only frames
+# ===========================
+def _refuse(*args, **kwargs):
+    raise TypeError("frame นี้อ่านอย่างเดียว (แชร์กับ cache) ใช้ schema.thaw(df) หรือ df.assign(...) แทน")
+
+class _ReadOnlyIndexer:
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    __setitem__ = _refuse
+
+class FrozenFrame(pd.DataFrame):
+    """
+    DataFrame ที่แก้ค่าในตัวเองไม่ได้ (กันหน้าไปแก้ object ที่ cache แชร์กันทุก rerun)
+    ผลของการ filter / sort / assign / copy เป็น DataFrame ธรรมดา แก้ไขได้ตามปกติ
+    """
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    __setitem__ = __delitem__ = insert = pop = update = _update_inplace = _refuse
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(pd.DataFrame.loc.fget(self))
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(pd.DataFrame.iloc.fget(self))
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(pd.DataFrame.at.fget(self))
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(pd.DataFrame.iat.fget(self))
+
+def freeze(df):
+    return df if isinstance(df, FrozenFrame) else FrozenFrame(df)
+
+def thaw(df):
+    """
+    DataFrame ธรรมดาที่แก้ไขได้ (copy-on-write: ไม่คัดลอกข้อมูลจริงจนกว่าจะแก้คอลัมน์นั้น)
+    """
+    return pd.DataFrame(df)
+
+def load(table, start=None, end=None):
+    """
+    storage.read + แปลงชนิดตาม schema + read-only (ใช้ใน loader ของแต่ละหน้า)
+    """
+    return freeze(apply(table, storage.read(table, start=start, end=end)))
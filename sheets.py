@@ -0,0 +1,156 @@
+import streamlit as st
+import pandas as pd
+from streamlit_gsheets import GSheetsConnection
+import perf
+
+# ===========================
+# Shared worksheet snapshots
+# ===========================
+# sheet "rebalance" มีหลายตารางวางอยู่ในชีทเดียว (asset / pyramid / US stock)
+# อ่านทั้งชีทครั้งเดียวต่อ TTL แล้วให้แต่ละหน้าตัดเอาส่วนของตัวเอง แทนที่จะอ่านซ้ำ 5 รอบด้วย skiprows คนละค่า
+
+@perf.cache_data(ttl=600, tables=["assets", "pyramid", "us_stocks"])
+def load_rebalance_snapshot():
+    """
+    อ่าน sheet "rebalance" แบบดิบ (ไม่มี header, ไม่ข้ามแถวว่าง) เพื่อให้ index แถวตรงกับเลขแถวในชีท
+    """
+    conn = st.connection("gsheets", type=GSheetsConnection)
+    return conn.read(worksheet="rebalance", header=None, skip_blank_lines=False)
+
+def _header_names(values):
+    # ตั้งชื่อคอลัมน์แบบเดียวกับ pandas: ช่องว่าง -> 'Unnamed: i', ชื่อซ้ำ -> 'name.1'
+    names, seen = [], {}
+    for i, v in enumerate(values):
+        name = f"Unnamed: {i}" if pd.isna(v) else str(v).strip()
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _infer_numeric(df):
+    # คอลัมน์ที่ทุกค่าเป็นตัวเลขได้ -> แปลงเป็นตัวเลข (เหมือนตอน pandas อ่านเฉพาะตารางนั้น)
+    for col in df.columns:
+        converted = pd.to_numeric(df[col], errors='coerce')
+        if converted.notna().sum() == df[col].notna().sum():
+            df[col] = converted
+    return df
+
+def sheet_block(raw, skiprows):
+    """
+    ตัดตารางออกจาก snapshot ดิบ ให้ผลเหมือน conn.read(..., skiprows=skiprows)
+    แถวแรกหลัง skiprows เป็น header
+    """
+    block = raw.iloc[skiprows + 1:].copy()
+    block.columns = _header_names(raw.iloc[skiprows].tolist())
+    block = block.reset_index(drop=True)
+    return _infer_numeric(block)
+
+def rebalance_block(skiprows):
+    """
+    ตารางใน sheet "rebalance" ที่เริ่มหลัง skiprows แถว (อ่านจาก snapshot เดียวกันทุกหน้า)
+    - skiprows=1  : asset (คอลัมน์ 6:11) และ pyramid (คอลัมน์ 11:19)
+    - skiprows=14 : รายการหุ้น US
+    """
+    return sheet_block(load_rebalance_snapshot(), skiprows)
+
+# ===========================
+# Row-level writes
+# ===========================
+def _cell_value(value):
+    # ค่าที่ส่งให้ Sheets: NaN/None -> ช่องว่าง, numpy -> python
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+# คีย์ของ service account (ที่เหลือใน secrets เช่น spreadsheet / worksheet เป็นของ st.connection)
+_CREDENTIAL_KEYS = (
+    "type", "project_id", "private_key_id", "private_key", "client_email", "client_id",
+    "auth_uri", "token_uri", "auth_provider_x509_cert_url", "client_x509_cert_url", "universe_domain",
+)
+
+@st.cache_resource
+def _open_spreadsheet():
+    """
+    spreadsheet ของ connection "gsheets" ผ่าน gspread client ของเราเอง (ใช้ secrets ชุดเดียวกับ st.connection)
+    ค่า spreadsheet เป็น URL / key / ชื่อไฟล์ ก็ได้ (เปิดแบบเดียวกับ streamlit_gsheets)
+    """
+    import gspread
+    from validators.url import url as validate_url
+
+    secrets = st.secrets["connections"]["gsheets"]
+    spreadsheet = secrets.get("spreadsheet")
+    if secrets.get("type") != "service_account" or not spreadsheet:
+        raise RuntimeError("เขียนข้อมูลได้เฉพาะตอนเชื่อมด้วย Service Account เท่านั้น")
+    client = gspread.service_account_from_dict({k: secrets[k] for k in _CREDENTIAL_KEYS if k in secrets})
+
+    if validate_url(spreadsheet):
+        return client.open_by_url(spreadsheet)
+    try:
+        return client.open_by_key(spreadsheet)
+    except (gspread.exceptions.SpreadsheetNotFound, gspread.exceptions.APIError):
+        # ไม่ใช่ key -> เปิดตามชื่อไฟล์ (streamlit_gsheets ใช้ค่า worksheet ใน secrets เป็น folder_id)
+        return client.open(spreadsheet, folder_id=secrets.get("worksheet"))
+
+def _open_worksheet(worksheet):
+    return _open_spreadsheet().worksheet(worksheet)
+
+def upsert_rows(worksheet, rows, key='Date', update_only=()):
+    """
+    เขียนเฉพาะแถวที่เปลี่ยน แทนการเขียนทับทั้งชีท (conn.update)
+    - แถวที่ key (เช่นวันที่) มีอยู่แล้ว -> อัปเดตเฉพาะ cell ของคอลัมน์ที่ส่งมา
+    - แถวใหม่ -> append ต่อท้าย (คอลัมน์ใน update_only จะเว้นว่างไว้ตอน append)
+    อ่านจากชีทแค่ header กับคอลัมน์ key ต้นทุนจึงไม่ขึ้นกับจำนวนคอลัมน์ / ข้อมูลในแถวอื่น
+    คืนค่า (จำนวนแถวที่อัปเดต, จำนวนแถวที่เพิ่ม)
+    """
+    from gspread.utils import rowcol_to_a1
+
+    ws = _open_worksheet(worksheet)
+    header = ws.row_values(1)
+
+    # คอลัมน์ใหม่ (เช่น benchmark ตัวใหม่) -> ต่อท้าย header
+    new_cols = [c for c in rows.columns if c not in header]
+    if new_cols:
+        # keyword: gspread 6 สลับลำดับ positional เป็น (values, range_name)
+        ws.update(range_name=rowcol_to_a1(1, len(header) + 1), values=[new_cols], value_input_option="USER_ENTERED")
+        header = header + new_cols
+
+    # หาแถวของแต่ละ key (เทียบเป็นวันที่ กันรูปแบบวันที่ในชีทไม่ตรงกัน)
+    key_idx = header.index(key) + 1
+    existing = pd.to_datetime(pd.Series(ws.col_values(key_idx)[1:], dtype=object), errors='coerce')
+    row_of = {d: i + 2 for i, d in enumerate(existing) if pd.notna(d)}
+    row_keys = pd.to_datetime(rows[key], errors='coerce')
+
+    # คอลัมน์ที่อัปเดต แบ่งเป็นช่วงที่ติดกันใน header -> 1 range ต่อช่วงต่อแถว (แทนทีละ cell)
+    positions = sorted((header.index(c) + 1, c) for c in rows.columns if c != key)
+    runs = []
+    for pos, col in positions:
+        if runs and runs[-1][-1][0] == pos - 1:
+            runs[-1].append((pos, col))
+        else:
+            runs.append([(pos, col)])
+
+    cell_updates, appends = [], []
+    for row_key, (_, row) in zip(row_keys, rows.iterrows()):
+        sheet_row = row_of.get(row_key)
+        if sheet_row:
+            for run in runs:
+                cell_updates.append({
+                    "range": f"{rowcol_to_a1(sheet_row, run[0][0])}:{rowcol_to_a1(sheet_row, run[-1][0])}",
+                    "values": [[_cell_value(row[col]) for _, col in run]],
+                })
+        else:
+            appends.append([
+                _cell_value(row[c]) if c in rows.columns and c not in update_only else ""
+                for c in header
+            ])
+
+    if cell_updates:
+        ws.batch_update(cell_updates, value_input_option="USER_ENTERED")
+    if appends:
+        ws.append_rows(appends, value_input_option="USER_ENTERED")
+    return len(rows) - len(appends), len(appends)
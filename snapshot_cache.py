@@ -0,0 +1,155 @@
+import os
+import time
+import logging
+import threading
+import pandas as pd
+import perf
+
+# ===========================
+# Local snapshot cache (stale-while-revalidate)
+# ===========================
+# เก็บสำเนาล่าสุดของแต่ละตาราง (worksheet + ช่วงที่อ่าน) เป็นไฟล์ Parquet ในเครื่อง อยู่รอดข้าม restart
+# (ตารางที่ Parquet เก็บไม่ได้ เช่นคอลัมน์ object ที่มีทั้งตัวเลขและข้อความของแถว Total -> เก็บเป็น pickle แทน)
+# - มีสำเนาแล้ว -> คืนสำเนาทันที ถ้าเก่ากว่า MAX_AGE_S ค่อยโหลดใหม่เบื้องหลัง (หน้าไม่ต้องรอ Sheets)
+# - ยังไม่มีสำเนา -> โหลดจริงแล้วบันทึก
+# - WEALTH_OFFLINE=1 -> ไม่ต่อ Sheets เลย ใช้เฉพาะสำเนาในเครื่อง
+CACHE_DIR = os.environ.get("SNAPSHOT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "snapshots"))
+MAX_AGE_S = float(os.environ.get("SNAPSHOT_MAX_AGE_S", "600"))
+OFFLINE = os.environ.get("WEALTH_OFFLINE", "") == "1"
+
+log = logging.getLogger("wealth.snapshots")
+
+_lock = threading.Lock()
+_refreshing = set()
+# เวลาที่โหลดสำเนาที่ส่งให้หน้าไปล่าสุด (ใช้โชว์อายุข้อมูล)
+served = {}
+# key -> สาเหตุที่บันทึกสำเนาไม่ได้ (โชว์ใน render_status: ตารางนี้ต้องรอ Sheets ทุกครั้ง)
+failed = {}
+
+FORMATS = ("parquet", "pkl")
+
+def _path(key, ext="parquet"):
+    return os.path.join(CACHE_DIR, f"{key}.{ext}")
+
+def _existing(key):
+    for ext in FORMATS:
+        path = _path(key, ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+def fetched_at(key):
+    """
+    เวลา (epoch) ที่โหลดสำเนาของ key มาจาก Sheets หรือ None ถ้ายังไม่มีสำเนา
+    """
+    path = _existing(key)
+    return os.path.getmtime(path) if path else None
+
+def _write(path, write):
+    # เขียนไฟล์ชั่วคราวแล้วค่อย rename -> คนอ่านไม่เจอไฟล์ครึ่งๆ กลางๆ
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def store(key, df):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        _write(_path(key, "parquet"), lambda tmp: df.to_parquet(tmp, index=False))
+        ext = "parquet"
+    except Exception as e:
+        # คอลัมน์ object ที่ type ปนกัน (ตัวเลข + ข้อความ) Parquet เก็บไม่ได้ -> pickle เก็บได้ครบเหมือนที่อ่านมา
+        log.info("snapshot %s stored as pickle (parquet: %s)", key, e)
+        try:
+            _write(_path(key, "pkl"), lambda tmp: df.to_pickle(tmp))
+            ext = "pkl"
+        except Exception as e:
+            failed[key] = str(e)
+            log.error("snapshot %s not saved: %s", key, e)
+            return
+    failed.pop(key, None)
+    # ลบสำเนารูปแบบอื่นที่ค้างอยู่ (ไม่ให้ _existing เจอของเก่า)
+    for other in FORMATS:
+        if other != ext and os.path.exists(_path(key, other)):
+            os.remove(_path(key, other))
+
+def _load(path):
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_pickle(path)
+
+def invalidate(key):
+    """
+    ลบสำเนา (เช่นหลังเขียนข้อมูลลงชีท) รอบหน้าจะโหลดใหม่ทันที ไม่ได้ของเก่า
+    """
+    for ext in FORMATS:
+        path = _path(key, ext)
+        if os.path.exists(path):
+            os.remove(path)
+    served.pop(key, None)
+
+def _refresh(key, fetch):
+    try:
+        store(key, fetch())
+        # ได้ข้อมูลใหม่แล้ว -> ล้าง loader ที่ถือสำเนาเก่าไว้ rerun ถัดไปจะเห็นข้อมูลใหม่
+        perf.invalidate(key)
+    except Exception as e:
+        log.warning("background refresh of %s failed, keeping snapshot: %s", key, e)
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+def refresh_in_background(key, fetch):
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(target=_refresh, args=(key, fetch), name=f"snapshot-{key}", daemon=True).start()
+
+@perf.instrument
+def read(key, fetch):
+    """
+    คืนข้อมูลของ key: สำเนาในเครื่อง (ถ้ามี) หรือ fetch() จาก Sheets
+    สำเนาเก่ากว่า MAX_AGE_S -> คืนสำเนาไปก่อน แล้ว fetch ใหม่เบื้องหลัง
+    """
+    path = _existing(key)
+    if path is not None:
+        ts = os.path.getmtime(path)
+        df = _load(path)
+        if not OFFLINE and time.time() - ts > MAX_AGE_S:
+            refresh_in_background(key, fetch)
+        served[key] = ts
+        return df
+
+    if OFFLINE:
+        raise LookupError(f"ออฟไลน์อยู่และยังไม่มีสำเนาของ {key} ในเครื่อง")
+    df = fetch()
+    store(key, df)
+    served[key] = time.time()
+    return df
+
+def _format_age(seconds):
+    if seconds < 60:
+        return "เมื่อสักครู่"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} นาทีที่แล้ว"
+    if seconds < 86400:
+        return f"{seconds / 3600:.0f} ชั่วโมงที่แล้ว"
+    return f"{seconds / 86400:.0f} วันที่แล้ว"
+
+def render_status():
+    """
+    caption บอกอายุข้อมูล (สำเนาที่เก่าที่สุดที่หน้านี้ใช้) + สถานะออฟไลน์
+    """
+    import streamlit as st
+    if OFFLINE:
+        st.caption("🔌 Offline mode: แสดงข้อมูลจากสำเนาในเครื่อง")
+    if failed:
+        st.warning(f"⚠️ บันทึกสำเนาในเครื่องไม่ได้: {', '.join(sorted(failed))} (ต้องโหลดจาก Google Sheets ทุกครั้ง)")
+    if not served:
+        return
+    oldest = min(served.values())
+    age = time.time() - oldest
+    note = " (กำลังอัปเดตเบื้องหลัง)" if _refreshing else ""
+    st.caption(f"🕒 ข้อมูลจาก Google Sheets {_format_age(age)}{note}")
@@ -0,0 +1,304 @@
+import os
+import sqlite3
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import sheets
+import snapshot_cache
+import perf
+
+# ===========================
+# Storage backends
+# ===========================
+# ข้อมูลพอร์ตทุกตารางอ่าน/เขียนผ่านโมดูลนี้ หน้าต่างๆ ไม่ต้องรู้ว่าอยู่ชีทไหน skiprows / iloc เท่าไหร่
+# - gsheets (default) : Google Sheets เหมือนเดิม (ตำแหน่งตารางในชีทรวมไว้ที่ GSheetsBackend)
+# - sqlite            : ไฟล์ในเครื่อง มี index คอลัมน์ Date อ่านเร็ว + query ช่วงวันที่ได้ + ไม่ต้องต่อเน็ต
+# เลือกด้วย WEALTH_STORAGE=sqlite (ไฟล์ที่ WEALTH_DB_PATH) ดึงข้อมูลจากชีทลงไฟล์: python storage.py import
+# การอ่านจาก Sheets ผ่าน snapshot_cache (สำเนา Parquet ในเครื่อง คืนทันทีแล้วค่อยอัปเดตเบื้องหลัง)
+BACKEND = os.environ.get("WEALTH_STORAGE", "gsheets")
+DB_PATH = os.environ.get("WEALTH_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "wealth.sqlite"))
+
+# ตารางทั้งหมด: คอลัมน์ Date (ถ้ามี) คืนค่าเป็น datetime64 เสมอไม่ว่า backend ไหน
+TABLES = [
+    "assets",        # สินทรัพย์แต่ละประเภท (rebalance)
+    "pyramid",       # ชั้น pyramid + Target(%) (rebalance)
+    "us_stocks",     # หุ้น US ที่ถืออยู่ (rebalance)
+    "transactions",  # Buying track
+    "fund_summary",  # กองทุน + แถว total
+    "fund_history",  # ผลตอบแทนกองทุนรายเดือน (long format)
+    "portfolio_hx",  # Portfolio_Hx รายวัน
+]
+
+log = logging.getLogger("wealth.storage")
+
+ASSET_COLUMNS = ['AssetName', 'Invest', 'Value', 'GainLoss_Text', 'Portion']
+PYRAMID_COLUMNS = ['Pyramid', 'Asset', 'Invest', 'Value', 'GainLoss', 'Portion (%)', 'Target(%)']
+
+def _filter_dates(df, start=None, end=None):
+    # ช่วงวันที่แบบรวมทั้งสองฝั่ง [start, end]
+    if start is not None:
+        df = df[df['Date'] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df['Date'] <= pd.Timestamp(end)]
+    return df.reset_index(drop=True)
+
+class GSheetsBackend:
+    """
+    Google Sheets: ตำแหน่งของแต่ละตารางในชีท (worksheet / skiprows / iloc) อยู่ที่นี่ที่เดียว
+    """
+    name = "gsheets"
+    WORKSHEETS = {"portfolio_hx": "Portfolio_Hx"}
+
+    def _connection(self):
+        import streamlit as st
+        from streamlit_gsheets import GSheetsConnection
+        return st.connection("gsheets", type=GSheetsConnection)
+
+    def _assets(self):
+        df = sheets.rebalance_block(skiprows=1).iloc[:10, 6:11]
+        df.columns = ASSET_COLUMNS
+        return df
+
+    def _pyramid(self):
+        df = sheets.rebalance_block(skiprows=1).iloc[:3, 11:19]
+        df.columns = PYRAMID_COLUMNS
+        return df
+
+    def _us_stocks(self):
+        return sheets.rebalance_block(skiprows=14)
+
+    def _transactions(self):
+        df = self._connection().read(worksheet='Buying track', skiprows=6)
+        df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y')
+        return df
+
+    def _fund_summary(self):
+        return self._connection().read(worksheet="Fund summary", skiprows=5).head(5)
+
+    def _fund_history(self):
+        df = self._connection().read(worksheet="Fund summary", skiprows=15)
+        # วันที่ใส่ไว้แค่แถวแรกของแต่ละเดือน
+        df['Date'] = pd.to_datetime(df['Date'], format='%m/%Y', errors='coerce').ffill()
+        return df
+
+    def _portfolio_hx(self):
+        # ttl=0: ไม่ใช้ cache ของ connection (cache อยู่ที่ loader ของแต่ละหน้า ล้างแล้วได้ข้อมูลใหม่จริง)
+        df = self._connection().read(worksheet="Portfolio_Hx", ttl=0)
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        return df
+
+    def read(self, table, start=None, end=None):
+        df = getattr(self, f"_{table}")()
+        if (start is not None or end is not None) and 'Date' in df.columns:
+            df = _filter_dates(df, start, end)
+        return df
+
+    def upsert(self, table, rows, key='Date', update_only=()):
+        return sheets.upsert_rows(self.WORKSHEETS.get(table, table), rows, key=key, update_only=update_only)
+
+def _sql_value(value):
+    # ค่าที่เก็บลง SQLite: NaN/NaT -> NULL, Timestamp -> 'YYYY-MM-DD', numpy -> python
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+class SQLiteBackend:
+    """
+    ไฟล์ SQLite ในเครื่อง: 1 ตาราง = 1 table, วันที่เก็บเป็น 'YYYY-MM-DD' + index (query ช่วงวันที่ไม่ต้องสแกนทั้งตาราง)
+    คอลัมน์ไม่กำหนด type (ค่าเป็นตัวเลข/ข้อความตามที่เขียนลงไป เหมือน cell ในชีท)
+    """
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = path or DB_PATH
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        return sqlite3.connect(self.path)
+
+    def _columns(self, db, table):
+        return [row[1] for row in db.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def _rows(self, df, columns):
+        df = df.copy()
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        return [[_sql_value(v) for v in row] for row in df[columns].itertuples(index=False)]
+
+    def read(self, table, start=None, end=None):
+        db = self._connect()
+        try:
+            columns = self._columns(db, table)
+            if not columns:
+                raise LookupError(f"ไม่มีตาราง {table} ใน {self.path} (รัน python storage.py import ก่อน)")
+            where, params = [], []
+            if start is not None and 'Date' in columns:
+                where.append('"Date" >= ?')
+                params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+            if end is not None and 'Date' in columns:
+                where.append('"Date" <= ?')
+                params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+            sql = f"SELECT * FROM {_quote(table)}"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            df = pd.read_sql_query(sql + " ORDER BY rowid", db, params=params)
+        finally:
+            db.close()
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+        return df
+
+    def write_table(self, table, df):
+        """
+        เขียนทับทั้งตาราง (ใช้ตอน import จากชีท / seed ข้อมูลเทส)
+        """
+        columns = list(df.columns)
+        db = self._connect()
+        with db:
+            db.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            db.execute(f"CREATE TABLE {_quote(table)} ({', '.join(_quote(c) for c in columns)})")
+            if 'Date' in columns:
+                db.execute(f"CREATE INDEX {_quote(f'idx_{table}_date')} ON {_quote(table)} (\"Date\")")
+            db.executemany(
+                f"INSERT INTO {_quote(table)} VALUES ({', '.join('?' * len(columns))})",
+                self._rows(df, columns)
+            )
+        db.close()
+
+    def upsert(self, table, rows, key='Date', update_only=()):
+        """
+        เหมือน sheets.upsert_rows: key มีแล้ว -> UPDATE เฉพาะคอลัมน์ที่ส่งมา / ยังไม่มี -> INSERT
+        (คอลัมน์ใน update_only เว้นว่างตอน INSERT) คืนค่า (จำนวนแถวที่อัปเดต, จำนวนแถวที่เพิ่ม)
+        """
+        db = self._connect()
+        with db:
+            existing = self._columns(db, table)
+            if not existing:
+                db.execute(f"CREATE TABLE {_quote(table)} ({', '.join(_quote(c) for c in rows.columns)})")
+                if key == 'Date':
+                    db.execute(f"CREATE INDEX {_quote(f'idx_{table}_date')} ON {_quote(table)} (\"Date\")")
+                existing = list(rows.columns)
+            for col in rows.columns:
+                if col not in existing:
+                    db.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)}")
+
+            columns = list(rows.columns)
+            set_cols = [c for c in columns if c != key]
+            update_sql = (
+                f"UPDATE {_quote(table)} SET {', '.join(f'{_quote(c)} = ?' for c in set_cols)} "
+                f"WHERE {_quote(key)} = ?"
+            )
+            insert_cols = [c for c in columns if c not in update_only]
+            insert_sql = (
+                f"INSERT INTO {_quote(table)} ({', '.join(_quote(c) for c in insert_cols)}) "
+                f"VALUES ({', '.join('?' * len(insert_cols))})"
+            )
+
+            updated = appended = 0
+            for values in self._rows(rows, columns):
+                row = dict(zip(columns, values))
+                cur = db.execute(update_sql, [row[c] for c in set_cols] + [row[key]])
+                if cur.rowcount:
+                    updated += 1
+                else:
+                    db.execute(insert_sql, [row[c] for c in insert_cols])
+                    appended += 1
+        db.close()
+        return updated, appended
+
+def backend():
+    return SQLiteBackend(DB_PATH) if BACKEND == "sqlite" else GSheetsBackend()
+
+def read(table, start=None, end=None, fresh=False):
+    """
+    อ่านตาราง (ชื่อใน TABLES) จาก backend ที่ตั้งไว้ start/end = กรองช่วงวันที่ (รวมทั้งสองฝั่ง)
+    fresh=True -> ไม่ใช้สำเนาในเครื่อง (ใช้ก่อนคำนวณแล้วเขียนกลับ)
+    """
+    store = backend()
+    if isinstance(store, GSheetsBackend):
+        # Sheets ช้า/อาจต่อไม่ได้ -> อ่านผ่านสำเนาในเครื่อง (คืนทันที อัปเดตเบื้องหลัง)
+        fetch = lambda: store.read(table)
+        if fresh and not snapshot_cache.OFFLINE:
+            df = fetch()
+            snapshot_cache.store(table, df)
+        else:
+            df = snapshot_cache.read(table, fetch)
+        if (start is not None or end is not None) and 'Date' in df.columns:
+            df = _filter_dates(df, start, end)
+        return df
+    return store.read(table, start=start, end=end)
+
+def upsert(table, rows, key='Date', update_only=()):
+    """
+    เขียนเฉพาะแถวที่เปลี่ยน (ตาม key) คืนค่า (จำนวนแถวที่อัปเดต, จำนวนแถวที่เพิ่ม)
+    หลังเขียน ล้าง cache เฉพาะ loader ที่อ่าน table นี้ (perf.invalidate)
+    """
+    store = backend()
+    if isinstance(store, GSheetsBackend):
+        if snapshot_cache.OFFLINE:
+            raise RuntimeError("ออฟไลน์อยู่ บันทึกลง Google Sheets ไม่ได้")
+        result = store.upsert(table, rows, key=key, update_only=update_only)
+        snapshot_cache.invalidate(table)
+    else:
+        result = store.upsert(table, rows, key=key, update_only=update_only)
+    perf.invalidate(table)
+    return result
+
+@perf.instrument
+def prefetch(tables=TABLES, max_workers=8):
+    """
+    อ่านทุกตารางที่ยังไม่มีสำเนาในเครื่องพร้อมกัน (thread pool) ก่อนหน้าต่างๆ render
+    cold start รอเท่ากับ worksheet ที่ช้าที่สุด แทนที่จะรอทีละ worksheet ต่อกัน
+    (assets / pyramid / us_stocks อ่านชีท rebalance ร่วมกัน -> cache ของ Streamlit ล็อกให้โหลดครั้งเดียว)
+    คืนรายชื่อตารางที่โหลด
+    """
+    if not isinstance(backend(), GSheetsBackend) or snapshot_cache.OFFLINE:
+        return []
+    missing = [t for t in tables if snapshot_cache.fetched_at(t) is None]
+    if not missing:
+        return []
+
+    # ให้ thread ใช้ context ของ session นี้ (cache ของ Streamlit ไม่เตือน missing ScriptRunContext)
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    ctx = get_script_run_ctx()
+
+    def attach():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    def fetch(table):
+        try:
+            read(table)
+        except Exception as e:
+            # หน้าที่ใช้ตารางนี้จะอ่านใหม่และแสดง error เอง
+            log.warning("prefetch %s failed: %s", table, e)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(missing)), initializer=attach) as pool:
+        list(pool.map(fetch, missing))
+    return missing
+
+def copy_tables(source, target, tables=TABLES):
+    """
+    คัดลอกทุกตารางจาก backend หนึ่งไปอีก backend (target ต้องมี write_table เช่น SQLiteBackend)
+    """
+    for table in tables:
+        target.write_table(table, source.read(table))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SQLite copy of the portfolio workbook")
+    parser.add_argument("command", choices=["import"], help="import: copy every table from Google Sheets")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    copy_tables(GSheetsBackend(), SQLiteBackend(args.db))
+    print(f"imported {len(TABLES)} tables into {args.db}")
@@ -1,16 +1,94 @@
-import streamlit as st
+import re
 import pandas as pd
-import yfinance as yf
-from streamlit_gsheets import GSheetsConnection
+import numpy as np
 from datetime import datetime, timedelta
+import price_cache
+import storage
+import perf
+
+PRICE_LOOKBACK_DAYS = 7
+
+# benchmark ที่ใช้เทียบ (ticker: ชื่อที่โชว์บนกราฟ) ทุกตัวเป็น USD เพราะจำลองซื้อด้วย 'Total Value ($)'
+# THD = iShares MSCI Thailand ETF ใช้แทนดัชนีหุ้นไทย (ซื้อขายเป็น USD ไม่ต้องแปลงค่าเงิน)
+BENCHMARKS = {
+    'SPY': 'S&P 500',
+    'QQQ': 'Nasdaq 100',
+    'VT': 'Total World',
+    'THD': 'Thailand (THD)',
+}
+
+def benchmark_columns(ticker):
+    """
+    ชื่อคอลัมน์ (มูลค่า, จำนวนหุ้น) ใน Portfolio_Hx ของ benchmark แต่ละตัว
+    SPY ใช้ชื่อเดิม (Strategy_SP500_Value / SPY_Shares) เพื่อให้ข้อมูลเก่ายังใช้ได้
+    """
+    if ticker == 'SPY':
+        return 'Strategy_SP500_Value', 'SPY_Shares'
+    clean = re.sub(r'[^A-Za-z0-9]', '', ticker).upper()
+    return f'Strategy_{clean}_Value', f'{clean}_Shares'
+
+def asof_prices(prices, dates):
+    """
+    ราคาล่าสุด ณ วันที่ที่ขอ (เหมือน Series.asof แต่ทำทีเดียวทั้ง array ด้วย searchsorted)
+    รับได้ทั้ง Series (ได้ 1D) และ DataFrame หลาย ticker (ได้ 2D: วันที่ x ticker)
+    วันที่ก่อนราคาแรกจะได้ NaN
+    """
+    # ffill = ข้ามวันที่ไม่มีราคา (วันหยุดของแต่ละตลาด) เหมือน asof
+    prices = prices.sort_index().ffill()
+    dates = pd.DatetimeIndex(dates)
+    pos = prices.index.searchsorted(dates, side='right') - 1
+    values = prices.to_numpy(dtype=float)
+    out = np.full((len(dates),) + values.shape[1:], np.nan)
+    found = pos >= 0
+    out[found] = values[pos[found]]
+    return out
+
+def replay_benchmark(hx_dates, trans, prices, initial_shares):
+    """
+    จำลองว่าถ้าเอาเงินทุกก้อนใน transaction ไปซื้อ benchmark แทน จะมีกี่หุ้น / มูลค่าเท่าไหร่ ณ แต่ละวันใน history
+    prices เป็น Series (ตัวเดียว) หรือ DataFrame (หลายตัว คำนวณพร้อมกันทีเดียว)
+    คืนค่า (shares, values) เป็น numpy array ขนาดเท่า (hx_dates[, ticker])
+    """
+    hx_dates = pd.DatetimeIndex(hx_dates)
+    trans = trans.sort_values('Date', kind='stable')
+    trans_dates = pd.DatetimeIndex(trans['Date'])
+
+    # 1. ตั้งราคาให้ทุก transaction ในรอบเดียว แล้วสะสมเป็นจำนวนหุ้น
+    #    (ใช้ np.cumsum ให้ NaN ไหลต่อไปเหมือนการบวกทีละแถวแบบเดิม)
+    trans_prices = asof_prices(prices, trans_dates)
+    cash = trans['Total Value ($)'].to_numpy(dtype=float).reshape((-1,) + (1,) * (trans_prices.ndim - 1))
+    bought = cash / trans_prices
+    cum_shares = np.concatenate((np.zeros((1,) + bought.shape[1:]), np.cumsum(bought, axis=0)))
+
+    # 2. map จำนวนหุ้นสะสมไปที่วันที่ของแต่ละแถว (นับ transaction ที่วันที่ <= วันนั้น)
+    n_trans = trans_dates.searchsorted(hx_dates, side='right')
+    shares = initial_shares + cum_shares[n_trans]
+    values = shares * asof_prices(prices, hx_dates)
+    return shares, values
+
+def find_replay_anchor(hx_df, today_str, share_cols=('SPY_Shares',)):
+    """
+    หา index ของแถวล่าสุด (ก่อนวันนี้) ที่มีจำนวนหุ้นของ benchmark ครบทุกตัวบันทึกไว้แล้ว เพื่อใช้เป็นจุดเริ่มคำนวณต่อ
+    แถวที่ยังเป็น 0 / ว่าง ถือว่ายังไม่ได้คำนวณ ถ้าไม่เจอเลยให้เริ่มจากแถวแรก
+    """
+    before_today = hx_df['Date'].dt.strftime('%Y-%m-%d') < today_str
+    shares = hx_df[list(share_cols)]
+    persisted = (shares.notna() & (shares != 0)).all(axis=1)
+    candidates = hx_df.index[before_today & persisted]
+    return int(candidates[-1]) if len(candidates) else 0
+
+@perf.instrument
+def update_portfolio_hx(current_value, current_total_cost, transactions_df,hx_table='portfolio_hx',benchmark_ticker='SPY',incremental=False):
+    # benchmark_ticker รับได้ทั้งตัวเดียว ('SPY') หรือหลายตัว (['SPY','QQQ',...])
+    tickers = [benchmark_ticker] if isinstance(benchmark_ticker, str) else list(benchmark_ticker)
+    value_cols = [benchmark_columns(t)[0] for t in tickers]
+    share_cols = [benchmark_columns(t)[1] for t in tickers]
 
-def update_portfolio_hx(current_value, current_total_cost, transactions_df,hx_sheet='Portfolio_Hx',benchmark_ticker='SPY'):
-    conn = st.connection("gsheets", type=GSheetsConnection)
     try:
-        hx_df = conn.read(worksheet=hx_sheet)
+        hx_df = storage.read(hx_table, fresh=True)
         hx_df['Date'] = pd.to_datetime(hx_df['Date']).dt.tz_localize(None)
     except:
-        hx_df=pd.DataFrame(columns=['Date','My_Stock_Cost','My_Stock_Value','Strategy_SP500_Value',"SPY_Shares"])
+        hx_df=pd.DataFrame(columns=['Date','My_Stock_Cost','My_Stock_Value']+value_cols+share_cols)
     
     today_str = datetime.now().strftime("%Y-%m-%d")
 
@@ -26,46 +104,58 @@ def update_portfolio_hx(current_value, current_total_cost, transactions_df,hx_sh
         'Date': today_str, 
         'My_Stock_Cost': current_total_cost,
         'My_Stock_Value': current_value, 
-        'Strategy_SP500_Value':0,
-        'SPY_Shares': 0
+        **{col: 0 for col in value_cols + share_cols}
         }])
         new_row['Date'] = pd.to_datetime(new_row['Date']).dt.tz_localize(None)
         hx_df=pd.concat([hx_df,new_row], ignore_index=True)
 
     hx_df = hx_df.sort_values(by='Date').reset_index(drop=True)
 
-    spy_share_1=hx_df['SPY_Shares'].iloc[0]
-    date_1=hx_df['Date'].iloc[0]
+    # benchmark ใหม่ที่ยังไม่มีคอลัมน์ใน sheet -> สร้างคอลัมน์ว่างไว้
+    for col in value_cols + share_cols:
+        hx_df[col] = hx_df[col].astype(float) if col in hx_df.columns else np.nan
+
+    # จุดตั้งต้น: full = แถวแรก / incremental = แถวล่าสุดที่มีจำนวนหุ้นบันทึกไว้แล้วครบทุก benchmark
+    start = find_replay_anchor(hx_df, today_str, share_cols) if incremental else 0
+    date_1=hx_df['Date'].iloc[start]
 
     trans=transactions_df.copy()
     trans['Date']=pd.to_datetime(trans['Date']).dt.tz_localize(None)
     trans=trans[trans['Date']> date_1]
 
-    spy_data=yf.download('SPY', start=date_1, end=datetime.now()+timedelta(days=1), progress=False)
-    if isinstance(spy_data.columns, pd.MultiIndex):
-        # แบบซับซ้อน (MultiIndex)
-        spy_price_df = spy_data['Close']['SPY'] 
+    # ดึงราคาย้อนไปเผื่อวันหยุด เพื่อให้ asof ของแถวแรกๆ ยังหาราคาเจอ
+    # ราคาเก่าอ่านจาก cache ในเครื่อง โหลดเน็ตเฉพาะช่วงที่ยังไม่มี (ทุก ticker ใน request เดียว)
+    price_start = date_1 - timedelta(days=PRICE_LOOKBACK_DAYS)
+    price_df = price_cache.get_close_prices(tickers, price_start, datetime.now()+timedelta(days=1))
+
+    # เริ่มจากแถวแรก -> ทุก benchmark (รวม SPY) เริ่มด้วยเงินเท่ามูลค่าพอร์ตหุ้นวันแรก (เส้นเทียบกันได้)
+    # เริ่มจาก anchor -> ใช้จำนวนหุ้นที่บันทึกไว้แล้วต่อ
+    seeded = start == 0
+    if seeded:
+        start_prices = asof_prices(price_df[tickers], [date_1])[0]
+        capital = pd.to_numeric(hx_df.loc[start, 'My_Stock_Value'], errors='coerce')
+        capital = 0.0 if pd.isna(capital) else float(capital)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            initial_shares = np.where(start_prices > 0, capital / start_prices, 0.0)
+        hx_df.loc[start, share_cols] = initial_shares
+        hx_df.loc[start, value_cols] = initial_shares * start_prices
     else:
-        # แบบธรรมดา (Single Index)
-        spy_price_df = spy_data['Close']
-    spy_price_df.index=spy_price_df.index.tz_localize(None)
-
-    for i, row in hx_df.iterrows():
-        if i==0: continue
-
-        rel_trans=trans[trans['Date']<= row['Date']]
-        add_share=0.0
-        for _, t_row in rel_trans.iterrows():
-            add_share+=t_row['Total Value ($)']/spy_price_df.asof(t_row['Date'])
-            
-        spy_share=  spy_share_1 + add_share
-        current_benchmark_value= spy_share*(spy_price_df.asof(row['Date']))
-
-        hx_df.at[i, 'Strategy_SP500_Value']= current_benchmark_value
-        hx_df.at[i,'SPY_Shares']=spy_share
+        initial_shares = np.array(hx_df.loc[start, share_cols], dtype=float)
+
+    # คำนวณทุก benchmark ทีเดียวเฉพาะแถวหลังจุดตั้งต้น (แถว anchor ไม่แตะ)
+    shares, benchmark_values = replay_benchmark(
+        hx_df['Date'].iloc[start + 1:], trans, price_df[tickers], initial_shares
+    )
+    hx_df.loc[start + 1:, value_cols] = benchmark_values
+    hx_df.loc[start + 1:, share_cols] = shares
     
     hx_df['Date'] = hx_df['Date'].dt.strftime('%Y-%m-%d')
-    conn.update(worksheet='Portfolio_Hx', data=hx_df)
 
-    return hx_df
+    # เขียนกลับเฉพาะแถวที่คำนวณใหม่ (ตั้งแต่จุดตั้งต้น + แถววันนี้) ไม่ต้องเขียนทับทั้งชีท
+    changed_cols = ['Date', 'My_Stock_Cost', 'My_Stock_Value'] + value_cols + share_cols
+    changed_from = start if seeded else start + 1
+    today_idx = hx_df.index[hx_df['Date'] == today_str][0]
+    changed_from = min(changed_from, today_idx)
+    storage.upsert(hx_table, hx_df.loc[changed_from:, changed_cols])
 
+    return hx_df
@@ -1,15 +1,22 @@
-import google.generativeai as genai
 import streamlit as st
 import pandas as pd
-from streamlit_gsheets import GSheetsConnection
+import schema
+import perf
 
 # ===========================
 # AI function
 # ===========================  
 #Config API Key (ควรซ่อนใน st.secrets ถ้าจะ deploy แต่วันนี้ใส่ตรงๆ หรือใช้ st.secrets ไปก่อนได้ครับ)
-API_KEY = st.secrets["GEMINI_API_KEY"]
-genai.configure(api_key=API_KEY) 
+@st.cache_resource
+def get_genai():
+    """
+    import + configure Gemini ครั้งแรกที่ใช้งานจริง (ไม่ทำตอน import หน้า)
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
+    return genai
 
+@perf.instrument
 def ask_warren_buffett(user_input, history_messages, uploaded_file=None, portfolio_df=None):
     """
     ฟังก์ชันเดียวจบ: รับคำถาม + ประวัติ + ไฟล์ -> ส่งคืนคำตอบสไตล์ปู่
@@ -75,6 +82,7 @@ def ask_warren_buffett(user_input, history_messages, uploaded_file=None, portfol
         prompt_parts.append("คำตอบของ Warren Buffett:")
 
         # C. เรียก Model
+        genai = get_genai()
         model = genai.GenerativeModel(
             'gemini-2.5-flash',
             system_instruction=buffett_persona
@@ -101,7 +109,7 @@ def analyze_uploaded_file(uploaded_file, prompt_text):
         "data": bytes_data
     }
     
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = get_genai().GenerativeModel('gemini-2.5-flash')
     try:
         # ส่งไปเป็น List: [ข้อความคำสั่ง, ข้อมูลไฟล์]
         response = model.generate_content([prompt_text, file_part])
@@ -112,29 +120,14 @@ def analyze_uploaded_file(uploaded_file, prompt_text):
 # ===========================
 # Load data
 # ===========================  
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["assets"], shared=True)
 def load_portfolio_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="rebalance", skiprows=1)
-    df = df.iloc[:10, 6:11]
-    df.columns = ['AssetName', 'Invest', 'Value', 'GainLoss_Text', 'Portion']
-    
-    cols_to_num = ['Invest', 'Value']
-    for col in cols_to_num:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
-        
-    return df
+    return schema.load("assets")
 
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["pyramid"], shared=True)
 def load_pyramid_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="rebalance", skiprows=1)
-    df = df.iloc[:3, 11:19]
-    df.columns = ['Pyramid', 'Asset', 'Invest', 'Value', 'GainLoss', 'Portion (%)', 'Target(%)']
-    df['GainLoss']= df['GainLoss']*100
-    df['Portion (%)']=df['Portion (%)']*100
-    df['Target(%)']=df['Target(%)']*100
-    return df
+    # GainLoss / Portion (%) / Target(%) เป็นหน่วย % แล้ว (schema)
+    return schema.load("pyramid")
 
 # ===========================
 # MAIN APP
@@ -209,6 +202,7 @@ def render_buffett_card(text):
     """
     st.markdown(html, unsafe_allow_html=True)
 
+@perf.instrument
 def show():
     inject_custom_css()
     df = load_pyramid_data()
@@ -1,49 +1,109 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import plotly.express as px
-import altair as alt
-from streamlit_gsheets import GSheetsConnection
+import schema
+import perf
+from views import zoom
 
-@st.cache_data(ttl=600)
+# '%' และ 'Portion' เป็นหน่วย % แล้ว (schema คูณ 100 ตอนโหลดครั้งเดียว)
+@perf.cache_data(ttl=600, tables=["fund_summary"], shared=True)
 def load_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="Fund summary", skiprows=5)
-    df=df.head(5)
-    return df
+    return schema.load("fund_summary")
 
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["fund_history"], shared=True)
 def load_Fund_Hx():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="Fund summary", skiprows=15)
-    df['Date'] = pd.to_datetime(df['Date'], format='%m/%Y', errors='coerce')
-    df['Date'] = df['Date'].ffill()
-    return df
+    return schema.load("fund_history")
+
+# -------------------------------------------------------
+# Fund history matrix (แยกออกมาเพื่อให้ benchmark / ใช้ซ้ำได้)
+# -------------------------------------------------------
+def build_fund_matrix(hx_df):
+    """
+    pivot ประวัติกองทุน (long: Date, Name, %) เป็น matrix วันที่ x กองทุน ครั้งเดียว + ค่าที่คำนวณต่อจากมัน
+    คืน dict: 'cumulative' % สะสม / 'mom' % เปลี่ยนแปลงจากเดือนก่อน / 'drawdown' % จากจุดสูงสุด
+              'monthly' ผลตอบแทนรายเดือน (สัดส่วน, index เป็นเดือน) / 'corr' corr ของผลตอบแทนรายเดือน
+    """
+    if hx_df is None or hx_df.empty:
+        empty = schema.freeze(pd.DataFrame())
+        return {'cumulative': empty, 'mom': empty, 'drawdown': empty, 'monthly': empty, 'corr': empty}
+    wide = hx_df.pivot_table(index='Date', columns='Name', values='%', aggfunc='last', observed=True)
+    wide.index = pd.DatetimeIndex(wide.index, name='Date')
+    wide.columns = wide.columns.astype(str)
+    wide.columns.name = None
+    cumulative = wide.sort_index().astype(float)
+
+    # % สะสม -> มูลค่าต่อ 1 บาท (กองทุนที่เริ่มทีหลังเป็น NaN ช่วงแรก ไม่นับในการเทียบเดือนก่อน)
+    growth = 1 + cumulative / 100
+    change = growth / growth.shift(1) - 1
+    drawdown = (growth / growth.cummax() - 1) * 100
+    monthly = change.iloc[1:].copy()
+    monthly.index = monthly.index.to_period('M')
+    return {
+        'cumulative': schema.freeze(cumulative),
+        'mom': schema.freeze(change * 100),
+        'drawdown': schema.freeze(drawdown),
+        'monthly': schema.freeze(monthly),
+        'corr': schema.freeze(monthly.corr(min_periods=3)),
+    }
+
+@perf.cache_data(ttl=600, tables=["fund_history"], shared=True)
+def load_fund_matrix():
+    return build_fund_matrix(load_Fund_Hx())
+
+# ซีรีส์ที่เลือกดูได้ในกราฟเทียบกองทุน -> (key ใน matrix, ชื่อแกน y)
+GRAPH_SERIES = {
+    "Cumulative": ('cumulative', 'ผลตอบแทนสะสม (%)'),
+    "Monthly change": ('mom', 'เปลี่ยนแปลงจากเดือนก่อน (%)'),
+    "Drawdown": ('drawdown', 'ลดลงจากจุดสูงสุด (%)'),
+}
 
 def display_graph():
-    hx_df= load_Fund_Hx()
-    hx_df['%']=hx_df['%']*100
-    all_funds=hx_df['Name'].unique().tolist()
+    import altair as alt
+
+    matrix = load_fund_matrix()
+    all_funds = matrix['cumulative'].columns.tolist()
 
     selected_funds = st.multiselect(
     "เลือกกองทุนที่ต้องการแสดง:",
     options=all_funds,
     default=all_funds)
-    
-    filtered_df = hx_df[hx_df['Name'].isin(selected_funds)]
-    chart = alt.Chart(filtered_df).mark_line(point=False).encode(
-        x=alt.X('Date', title='วันที่', axis=alt.Axis(format='%b/%Y')), # Format วันที่
-        y=alt.Y('%', title='ผลตอบแทน (%)', scale=alt.Scale(zero=False)), # zero=False เพื่อให้กราฟไม่เริ่มที่ 0 (เห็นความชันชัดขึ้น)
-        color=alt.Color('Name', title='กองทุน', legend=alt.Legend(orient='bottom')), # สีแยกตามชื่อกองทุน
-        tooltip=[alt.Tooltip('Date', format='%b %Y', title='Date'), 
-                'Name', 
-                alt.Tooltip('%', format='.2f', title='Return (%)')] # เอาเมาส์ชี้แล้วขึ้นเลข
+    view = st.radio("แสดง:", list(GRAPH_SERIES), horizontal=True, key="fund_graph_series")
+    key, y_title = GRAPH_SERIES[view]
+
+    # เลือกกองทุน = เลือกคอลัมน์ของ matrix ที่ cache ไว้ (ไม่ต้อง filter ทุกแถว) แล้วให้ Vega-Lite fold เป็น long เอง
+    wide = zoom.zoom(matrix[key][selected_funds], key="fund_graph").reset_index()
+    chart = alt.Chart(wide).transform_fold(
+        selected_funds, as_=['Name', '%']
+    ).mark_line(point=False).encode(
+        x=alt.X('Date:T', title='วันที่', axis=alt.Axis(format='%b/%Y')), # Format วันที่
+        y=alt.Y('%:Q', title=y_title, scale=alt.Scale(zero=False)), # zero=False เพื่อให้กราฟไม่เริ่มที่ 0 (เห็นความชันชัดขึ้น)
+        color=alt.Color('Name:N', title='กองทุน', legend=alt.Legend(orient='bottom')), # สีแยกตามชื่อกองทุน
+        tooltip=[alt.Tooltip('Date:T', format='%b %Y', title='Date'), 
+                alt.Tooltip('Name:N'), 
+                alt.Tooltip('%:Q', format='.2f', title='Return (%)')] # เอาเมาส์ชี้แล้วขึ้นเลข
     ).properties(
         height=400
     ).interactive() # 🛠️ แถม: ใส่ interactive ให้ซูมเข้าออกได้
 
     st.altair_chart(chart, use_container_width=True)
 
+    # corr ของผลตอบแทนรายเดือนระหว่างกองทุนที่เลือก
+    corr = matrix['corr']
+    if len(selected_funds) >= 2 and not corr.empty:
+        st.markdown("**Correlation (monthly returns)**")
+        pairs = corr.loc[selected_funds, selected_funds].rename_axis('Fund').reset_index().melt(
+            id_vars='Fund', var_name='Other', value_name='Corr'
+        )
+        heatmap = alt.Chart(pairs).mark_rect().encode(
+            x=alt.X('Fund:N', title=None, sort=selected_funds),
+            y=alt.Y('Other:N', title=None, sort=selected_funds),
+            color=alt.Color('Corr:Q', scale=alt.Scale(scheme='redblue', domain=[-1, 1], reverse=True)),
+            tooltip=['Fund', 'Other', alt.Tooltip('Corr:Q', format='.2f')]
+        )
+        labels = heatmap.mark_text(fontSize=12).encode(text=alt.Text('Corr:Q', format='.2f'), color=alt.value('black'))
+        st.altair_chart((heatmap + labels).properties(height=60 + 40 * len(selected_funds)), use_container_width=True)
+
+@perf.instrument
 def show():
     st.markdown("""
         <style>
@@ -341,8 +401,6 @@ def show():
 
     # Load data
     df = load_data()
-    df['%'] = df['%'] * 100
-    df['Portion']=df['Portion']*100
 
     total_val = df.loc[4, 'Value']
     total_cost = df.loc[4, 'Invest']
@@ -359,9 +417,6 @@ def show():
         'S&P500': {'icon': '🗽', 'color_class': 'fund-icon-green'},
     }
 
-    # Prepare Data for Hx graph
-    hx_df=load_Fund_Hx()
-    
     # ===== UI Section =====
     
     # 1. Top NAV Card
@@ -0,0 +1,120 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import timedelta
+from views import Funds
+from views import US_stocks
+import price_cache
+import optimizer
+import perf
+
+# ===========================
+# DATA
+# ===========================
+@perf.cache_data(ttl=600, tables=["fund_history", "us_stocks"], shared=True)
+def load_return_matrix():
+    # ผลตอบแทนรายเดือน (เดือน x สินทรัพย์) ของกองทุน + หุ้น US ที่ถืออยู่
+    funds = Funds.load_fund_matrix()
+    tickers = US_stocks.load_data()['US stock'].astype(str).tolist()
+    cumulative = funds['cumulative']
+    start = cumulative.index.min() - timedelta(days=31) if not cumulative.empty else pd.Timestamp.now() - timedelta(days=365 * 5)
+    prices = price_cache.get_close_prices(tickers, start) if tickers else None
+    return optimizer.return_matrix(funds['monthly'], prices)
+
+@perf.cache_data(ttl=600, tables=["fund_summary", "us_stocks", "transactions"], shared=True)
+def load_current_holdings():
+    """
+    มูลค่าปัจจุบัน (บาท) ของแต่ละกองทุน / หุ้น: หุ้น US แปลงจาก $ ด้วยอัตราเฉลี่ยของ Buying track
+    """
+    funds = Funds.load_data()
+    funds = funds[~funds['Name'].astype(str).str.lower().str.contains('total')]
+    stocks = US_stocks.load_data()
+    ledger = US_stocks.load_ledger()
+    usd = ledger['Total Value ($)'].sum() if ledger is not None else 0
+    fx = ledger['Net Value (THB)'].sum() / usd if usd else 1.0
+    return pd.concat([
+        pd.Series(funds['Value'].to_numpy(dtype=float), index=funds['Name'].astype(str)),
+        pd.Series(stocks['Value'].to_numpy(dtype=float) * fx, index=stocks['US stock'].astype(str)),
+    ])
+
+# ===========================
+# CHARTS
+# ===========================
+def display_frontier(front, mu, cov, assets, current):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=front['volatility'] * 100, y=front['return'] * 100, mode="lines",
+        line=dict(color="#2E8B57", width=3), name="Efficient frontier"
+    ))
+    fig.add_trace(go.Scatter(
+        x=np.sqrt(np.diag(cov)) * 100, y=mu * 100, mode="markers+text", text=assets,
+        textposition="top center", marker=dict(color="#B0BEC5", size=8), name="Assets"
+    ))
+    points = [("Min variance", front['min_variance'], "#636EFA"), ("Max Sharpe", front['max_sharpe'], "#FFA15A")]
+    if current is not None:
+        points.append(("Current", current, "#EF553B"))
+    for label, w, color in points:
+        ret, vol = optimizer.portfolio_stats(w, mu, cov)
+        fig.add_trace(go.Scatter(
+            x=vol * 100, y=ret * 100, mode="markers", name=label,
+            marker=dict(color=color, size=14, symbol="star" if label != "Current" else "circle")
+        ))
+    fig.update_layout(xaxis_title="Volatility (% p.a.)", yaxis_title="Return (% p.a.)", height=500, margin=dict(t=30))
+    st.plotly_chart(fig, use_container_width=True)
+
+# ===========================
+# MAIN APP
+# ===========================
+@perf.instrument
+def show():
+    st.title("🧮 Portfolio Optimizer")
+    st.caption("Mean-variance (ห้าม short): ใช้ผลตอบแทนรายเดือนของกองทุน + หุ้น US ช่วงที่มีข้อมูลครบทุกตัว")
+    st.markdown("---")
+
+    matrix = load_return_matrix()
+    if matrix.shape[1] < 2 or len(matrix) < optimizer.MIN_MONTHS:
+        st.info(f"⏳ ต้องมีสินทรัพย์อย่างน้อย 2 ตัวที่มีข้อมูลรายเดือนครบ {optimizer.MIN_MONTHS} เดือนขึ้นไป")
+        return
+
+    c1, c2 = st.columns(2)
+    with c1:
+        risk_free = st.number_input("Risk-free rate (% p.a.)", min_value=0.0, max_value=10.0, value=2.0, step=0.25) / 100
+    with c2:
+        n_points = st.slider("Frontier points", 100, 400, optimizer.FRONTIER_POINTS, step=50)
+
+    assets = matrix.columns.astype(str).tolist()
+    mu, cov = optimizer.moments(matrix)
+    front = optimizer.frontier(mu, cov, n_points=n_points, risk_free=risk_free)
+
+    # สัดส่วนปัจจุบันเฉพาะสินทรัพย์ที่อยู่ใน matrix (ตัวที่ข้อมูลไม่พอไม่นับ)
+    holdings = load_current_holdings().groupby(level=0).sum().reindex(assets).fillna(0)
+    current = holdings.to_numpy() / holdings.sum() if holdings.sum() > 0 else None
+
+    st.caption(f"{len(assets)} assets · {len(matrix)} months ({matrix.index.min()} – {matrix.index.max()})")
+    display_frontier(front, mu, cov, assets, current)
+
+    # น้ำหนักของแต่ละพอร์ต
+    table = pd.DataFrame({
+        'Asset': assets,
+        'Current (%)': current * 100 if current is not None else np.nan,
+        'Min variance (%)': front['min_variance'] * 100,
+        'Max Sharpe (%)': front['max_sharpe'] * 100,
+    })
+    stats = {}
+    for label, w in [("Current", current), ("Min variance", front['min_variance']), ("Max Sharpe", front['max_sharpe'])]:
+        if w is not None:
+            ret, vol = optimizer.portfolio_stats(w, mu, cov)
+            stats[label] = (ret[0], vol[0], (ret[0] - risk_free) / vol[0] if vol[0] > 0 else np.nan)
+
+    cols = st.columns(len(stats))
+    for col, (label, (ret, vol, sharpe)) in zip(cols, stats.items()):
+        col.metric(label, f"{ret * 100:.1f}% / {vol * 100:.1f}%", f"Sharpe {sharpe:.2f}", delta_color="off")
+
+    st.dataframe(
+        table[(table.drop(columns='Asset').fillna(0) > 0.05).any(axis=1)],
+        column_config={c: st.column_config.NumberColumn(format="%.1f%%") for c in table.columns if c != 'Asset'},
+        hide_index=True,
+        use_container_width=True
+    )
@@ -1,40 +1,133 @@
 import streamlit as st
 import pandas as pd
-import altair as alt
 from datetime import datetime
-from streamlit_gsheets import GSheetsConnection
 from views import pyramid
+from views import risk
+from views import zoom
+import storage
+import schema
+import returns
+import chart_cache
+import perf
 
 # -------------------------------------------------------
 # 1. Load & Clean Data
 # -------------------------------------------------------
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["assets"], shared=True)
 def load_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="rebalance", skiprows=1)
-    df = df.iloc[:10, 6:11]
-    df.columns = ['AssetName', 'Invest', 'Value', 'GainLoss_Text', 'Portion']
-    
-    cols_to_num = ['Invest', 'Value']
-    for col in cols_to_num:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
-        
-    return df
+    return schema.load("assets")
 
 # -------------------------------------------------------
 # Load History Data (เพื่อวาดกราฟ)
 # -------------------------------------------------------
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["portfolio_hx"], shared=True)
 def load_history_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="Portfolio_Hx") 
-    if 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    return df
+    return schema.load("portfolio_hx")
+
+@perf.cache_data(ttl=600, tables=["transactions"], shared=True)
+def load_ledger():
+    # Buying track ทั้งซื้อและขาย (กระแสเงินสดของหุ้น US ใน returns.performance)
+    return schema.load("transactions")
+
+# -------------------------------------------------------
+# Asset aggregation (แยกออกมาเพื่อให้ benchmark / ใช้ซ้ำได้)
+# -------------------------------------------------------
+def build_asset_items(df):
+    """
+    แปลงตาราง asset จาก rebalance เป็น list ของการ์ดสินทรัพย์ (เรียงตามมูลค่า พร้อม % ของพอร์ต)
+    คืนค่า (asset_items, total_value, total_invest)
+    """
+    asset_items = []
+    
+    for index, row in df.iterrows():
+        try:
+            name_raw = str(row['AssetName'])
+            
+            # 1. Skip แถวที่ไม่ใช่ข้อมูลสินทรัพย์
+            if pd.isna(row['Value']) or "Total" in name_raw or "Grand" in name_raw or name_raw == "nan":
+                continue
+            
+            # 2. Filter: กรองเฉพาะ "Fund Saving" หรือ "Stock Saving" ออก (เก็บ Savings หลักไว้)
+            name_lower = name_raw.lower()
+            if "fund saving" in name_lower or "stock saving" in name_lower:
+                continue
+
+            icon = name_raw.strip()[0] 
+            clean_name = name_raw.strip()[1:].strip()
+            val = row['Value'] if pd.notnull(row['Value']) else 0
+            inv = row['Invest'] if pd.notnull(row['Invest']) else 0
+            gain_val = val - inv
+            gain_pct = (gain_val / inv * 100) if inv != 0 else 0
+            
+            asset_items.append({
+                "name": clean_name,
+                "icon": icon,
+                "value": val,
+                "invest": inv,
+                "gain_val": gain_val,
+                "gain_pct": gain_pct
+            })
+        except Exception as e:
+            continue
+
+    # เรียงลำดับตามมูลค่า
+    asset_items.sort(key=lambda x: x['value'], reverse=True)
+
+    # คำนวณยอดรวมและ % ใหม่
+    total_value = sum(item['value'] for item in asset_items)
+    total_invest = sum(item['invest'] for item in asset_items)
+    for item in asset_items:
+        pct = (item['value'] / total_value * 100) if total_value != 0 else 0
+        item['percent'] = pct
+        item['label'] = f"{item['name']} ({pct:.1f}%)"
+
+    return asset_items, total_value, total_invest
+
+def create_donut(donut_df, total_value):
+    """
+    donut สัดส่วนสินทรัพย์ (Altair หลาย layer) + ยอดรวมตรงกลาง
+    """
+    import altair as alt
+
+    # 1. สร้าง Base Chart
+    base = alt.Chart(donut_df).encode(
+        theta=alt.Theta("value", stack=True)
+    )
+
+    # 2. สร้างวงโดนัท (ปรับขนาดรูตรงกลาง innerRadius)
+    pie = base.mark_arc(outerRadius=120, innerRadius=85).encode(
+        color=alt.Color("name", legend=None), # ซ่อน Legend
+        order=alt.Order("value", sort="descending"),
+        tooltip=["name", "value", alt.Tooltip("percent", format=".1f")]
+    )
+
+    # 3. สร้างป้ายกำกับด้านนอก (ชื่อ + %)
+    # หมายเหตุ: Altair ยังไม่มีเส้นชี้ (Leader line) ในตัว จึงวาง text ไว้ที่ radius วงนอกสุดแทน
+    text_labels = base.mark_text(radius=145, fill="black").encode(
+        text=alt.Text("label"),
+        order=alt.Order("value", sort="descending")
+    )
+
+    # 4. สร้างข้อความตรงกลาง (Total Balance)
+    center_value = alt.Chart(pd.DataFrame({'text': [f"฿ {total_value:,.0f}"]})).mark_text(
+        radius=0, size=26, fontWeight='bold', color='#1a5d3a'
+    ).encode(text='text')
+
+    center_label = alt.Chart(pd.DataFrame({'text': ["Total Balance"]})).mark_text(
+        radius=0, dy=25, size=14, color='#888' # dy คือเลื่อนลงมาข้างล่าง
+    ).encode(text='text')
+
+    # รวม Layer ทั้งหมดเข้าด้วยกัน
+    return alt.layer(pie, text_labels, center_value, center_label).resolve_scale(
+        theta="independent"
+    ).properties(
+        height=400 # เพิ่มความสูงให้กราฟมีที่ว่างสำหรับ Label ด้านนอก
+    )
 
 # -------------------------------------------------------
 # 2. Main Show Function
 # -------------------------------------------------------
+@perf.instrument
 def show():
     # --- CSS Styling ---
     st.markdown("""
@@ -76,45 +169,8 @@ def show():
         return
 
     # --- 🔢 Data Processing Logic ---
-    asset_items = []
-    
-    for index, row in df.iterrows():
-        try:
-            name_raw = str(row['AssetName'])
-            
-            # 1. Skip แถวที่ไม่ใช่ข้อมูลสินทรัพย์
-            if pd.isna(row['Value']) or "Total" in name_raw or "Grand" in name_raw or name_raw == "nan":
-                continue
-            
-            # 2. Filter: กรองเฉพาะ "Fund Saving" หรือ "Stock Saving" ออก (เก็บ Savings หลักไว้)
-            name_lower = name_raw.lower()
-            if "fund saving" in name_lower or "stock saving" in name_lower:
-                continue
-
-            icon = name_raw.strip()[0] 
-            clean_name = name_raw.strip()[1:].strip()
-            val = row['Value'] if pd.notnull(row['Value']) else 0
-            inv = row['Invest'] if pd.notnull(row['Invest']) else 0
-            gain_val = val - inv
-            gain_pct = (gain_val / inv * 100) if inv != 0 else 0
-            
-            asset_items.append({
-                "name": clean_name,
-                "icon": icon,
-                "value": val,
-                "invest": inv,
-                "gain_val": gain_val,
-                "gain_pct": gain_pct
-            })
-        except Exception as e:
-            continue
-
-    # เรียงลำดับตามมูลค่า
-    asset_items.sort(key=lambda x: x['value'], reverse=True)
+    asset_items, total_value, total_invest = build_asset_items(df)
 
-    # คำนวณยอดรวมและ % ใหม่
-    total_value = sum(item['value'] for item in asset_items)
-    total_invest = sum(item['invest'] for item in asset_items)
     total_profit = total_value - total_invest
     total_profit_pct = (total_profit / total_invest * 100) if total_invest != 0 else 0
     
@@ -123,10 +179,6 @@ def show():
 
     stock_value=df[df['AssetName']=='🚀 US stock']['Value'].iloc[0]
     stock_invest=df[df['AssetName']=='🚀 US stock']['Invest'].iloc[0]
-    for item in asset_items:
-        pct = (item['value'] / total_value * 100) if total_value != 0 else 0
-        item['percent'] = pct
-        item['label'] = f"{item['name']} ({pct:.1f}%)"
 
     # ---------------------------
     #   🏠 Display Section 
@@ -141,52 +193,26 @@ def show():
         if st.button("💾 Update Data"):
             with st.spinner("Saving Total to History..."):
                 try:
-                    conn = st.connection("gsheets", type=GSheetsConnection)
-                    current_history = conn.read(worksheet="Portfolio_Hx")
-                    current_history['Date'] = pd.to_datetime(current_history['Date'], errors='coerce')
-
                     today_str = datetime.now().strftime("%Y-%m-%d")
 
-                    # 2. เช็คว่า "วันนี้" มีข้อมูลหรือยัง?
-                    # ค้นหา index ที่วันที่ตรงกับวันนี้
-                    today_mask = current_history['Date'].dt.strftime('%Y-%m-%d') == today_str
-                         
-                    if today_mask.any():
-                        # --- กรณี A: มีอยู่แล้ว -> UPDATE แถวเดิม ---
-                        st.info(f"ℹ️ พบข้อมูลวันที่ {today_str} แล้ว กำลังอัปเดตทับ...")
-                        
-                        # ใช้ loc เพื่อแก้ค่าใน rows นั้น
-                        current_history.loc[today_mask, 'My_Total_Value'] = total_value
-                        current_history.loc[today_mask, 'My_Total_Cost'] = total_invest
-                        current_history.loc[today_mask, 'My_Fund_Value'] = fund_value
-                        current_history.loc[today_mask, 'My_Fund_Cost'] = fund_invest
-                        current_history.loc[today_mask, 'My_Stock_Value'] = stock_value
-                        current_history.loc[today_mask, 'My_Stock_Cost'] = stock_invest
-                        final_df = current_history # ใช้ dataframe ที่แก้แล้ว
-                        
-                    else:
-                        # --- กรณี B: ยังไม่มี -> APPEND แถวใหม่ ---
-                        new_row = pd.DataFrame([{
-                            "Date": today_str,
-                            "My_Stock_Value": None, # เว้นว่างไว้รอ update จากหน้า stock
-                            "Strategy_SP500_Value": None,
-                            "SPY_Shares": None,
-                            "My_Stock_Cost": None,
-                            "My_Fund_Cost": fund_invest,   # ✅ บันทึก
-                            "My_Fund_Value": fund_value,   # ✅ บันทึก
-                            "My_Total_Cost": total_invest,   # ✅ บันทึก
-                            "My_Total_Value": total_value    # ✅ บันทึก
-                        }])
-                        new_row['Date'] = pd.to_datetime(new_row['Date'])
-                        final_df = pd.concat([current_history, new_row], ignore_index=True)
-                    
-                    # 3. แปลง Date กลับเป็น string format มาตรฐานก่อน save (กัน error format)
-                    final_df['Date'] = final_df['Date'].dt.strftime('%Y-%m-%d')
-                    
-                    # 4. บันทึกกลับ
-                    conn.update(worksheet="Portfolio_Hx", data=final_df)
+                    # เขียนเฉพาะแถวของวันนี้ (มีแล้ว -> UPDATE เฉพาะ cell / ยังไม่มี -> APPEND แถวใหม่)
+                    today_row = pd.DataFrame([{
+                        "Date": today_str,
+                        "My_Total_Value": total_value,
+                        "My_Total_Cost": total_invest,
+                        "My_Fund_Value": fund_value,
+                        "My_Fund_Cost": fund_invest,
+                        "My_Stock_Value": stock_value,
+                        "My_Stock_Cost": stock_invest,
+                    }])
+                    updated, _ = storage.upsert(
+                        "portfolio_hx", today_row,
+                        update_only=["My_Stock_Value", "My_Stock_Cost"] # แถวใหม่เว้นว่างไว้รอ update จากหน้า stock
+                    )
+                    if updated:
+                        st.info(f"ℹ️ พบข้อมูลวันที่ {today_str} แล้ว อัปเดตทับเรียบร้อย")
+                    # storage.upsert ล้าง cache เฉพาะ loader ที่อ่าน Portfolio_Hx (กราฟ) หน้าอื่นไม่ต้องโหลดใหม่
                     st.success(f"✅ Saved successfully for {today_str}!")
-                    st.cache_data.clear() # ล้าง cache ให้กราฟอัปเดต
                     
                 except Exception as e:
                     st.error(f"Update failed: {e}")
@@ -207,43 +233,11 @@ def show():
         st.subheader("📊 Portfolio Composition")
         if asset_items:
             donut_df = pd.DataFrame(asset_items)
-
-            # 1. สร้าง Base Chart
-            base = alt.Chart(donut_df).encode(
-                theta=alt.Theta("value", stack=True)
-            )
-
-            # 2. สร้างวงโดนัท (ปรับขนาดรูตรงกลาง innerRadius)
-            pie = base.mark_arc(outerRadius=120, innerRadius=85).encode(
-                color=alt.Color("name", legend=None), # ซ่อน Legend
-                order=alt.Order("value", sort="descending"),
-                tooltip=["name", "value", alt.Tooltip("percent", format=".1f")]
-            )
-
-            # 3. สร้างป้ายกำกับด้านนอก (ชื่อ + %)
-            # หมายเหตุ: Altair ยังไม่มีเส้นชี้ (Leader line) ในตัว จึงวาง text ไว้ที่ radius วงนอกสุดแทน
-            text_labels = base.mark_text(radius=145, fill="black").encode(
-                text=alt.Text("label"),
-                order=alt.Order("value", sort="descending")
-            )
-
-            # 4. สร้างข้อความตรงกลาง (Total Balance)
-            center_value = alt.Chart(pd.DataFrame({'text': [f"฿ {total_value:,.0f}"]})).mark_text(
-                radius=0, size=26, fontWeight='bold', color='#1a5d3a'
-            ).encode(text='text')
-            
-            center_label = alt.Chart(pd.DataFrame({'text': ["Total Balance"]})).mark_text(
-                radius=0, dy=25, size=14, color='#888' # dy คือเลื่อนลงมาข้างล่าง
-            ).encode(text='text')
-
-            # รวม Layer ทั้งหมดเข้าด้วยกัน
-            chart = alt.layer(pie, text_labels, center_value, center_label).resolve_scale(
-                theta="independent"
-            ).properties(
-                height=400 # เพิ่มความสูงให้กราฟมีที่ว่างสำหรับ Label ด้านนอก
+            # spec เดิมใช้ซ้ำได้ทุก rerun / ทุก session จนกว่าข้อมูลจะเปลี่ยน (ไม่ต้องสร้าง chart + to_dict ใหม่)
+            spec = chart_cache.altair_spec(
+                "overview.donut", [donut_df], lambda: create_donut(donut_df, total_value), params=(total_value,)
             )
-
-            st.altair_chart(chart, use_container_width=True)
+            st.vega_lite_chart(spec, use_container_width=True)
 
         # Area Chart (History)
         st.subheader("📈 Wealth Growth (Total)")
@@ -253,7 +247,20 @@ def show():
                 # dropna() เพื่อไม่ให้กราฟขาดตอนจากข้อมูลที่เป็น None
                 chart_data = df_history[['Date', 'My_Total_Value', 'My_Total_Cost']].dropna().set_index('Date')
                 chart_data.columns = ['Net Worth', 'Invested']
+                chart_data = zoom.zoom(chart_data, key="overview_growth")
                 st.area_chart(chart_data, color=["#2E8B57", "#B0BEC5"])
+
+                # ผลตอบแทนที่หักผลของเงินเติมออกแล้ว (TWR) + ผลตอบแทนต่อปีของเงินเราจริง (XIRR)
+                summary = returns.performance(df_history, load_ledger())['summary']
+                st.dataframe(
+                    summary[summary['Series'].isin(list(returns.SERIES))],
+                    column_config={
+                        c: st.column_config.NumberColumn(format="%.2f%%")
+                        for c in ['TWR (%)', 'TWR p.a. (%)', 'XIRR (%)', 'Simple (%)']
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
         except Exception as e:
             st.warning(f"Graph error: {e}")
 
@@ -295,4 +302,10 @@ def show():
                 </div>
                 """, unsafe_allow_html=True)
         else:
-            pyramid.show_pyramid()
\ No newline at end of file
+            pyramid.show_pyramid()
+
+    st.markdown("---")
+    try:
+        risk.show_risk(load_history_data(), load_ledger(), 'Total', key="overview")
+    except Exception as e:
+        st.warning(f"Risk error: {e}")
\ No newline at end of file
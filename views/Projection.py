@@ -0,0 +1,105 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from views import Overview
+from views import pyramid
+import projection
+import perf
+
+# ===========================
+# DATA
+# ===========================
+@perf.cache_data(ttl=600, tables=["pyramid", "portfolio_hx", "transactions"], shared=True)
+def load_assumptions():
+    # ผลตอบแทน / ความผันผวน / corr ของแต่ละชั้น pyramid จากประวัติพอร์ต (ชั้นที่ไม่มีประวัติใช้ค่าตั้งต้น)
+    return projection.estimate_assumptions(
+        pyramid.load_pyramid_data(), Overview.load_history_data(), Overview.load_ledger()
+    )
+
+PATH_OPTIONS = [1_000, 10_000, 50_000, 100_000, 200_000]
+
+# ===========================
+# CHARTS
+# ===========================
+def display_fan_chart(result, target):
+    import plotly.graph_objects as go
+
+    pct = result['percentiles']
+    dates = pd.Timestamp.today().normalize() + pd.to_timedelta(pct.index * 30.4375, unit='D')
+    fig = go.Figure()
+    # แถบ P5-P95 และ P25-P75 (fill ระหว่างเส้นล่างกับเส้นบน)
+    for low, high, color in [("P5", "P95", "rgba(46,139,87,0.15)"), ("P25", "P75", "rgba(46,139,87,0.35)")]:
+        fig.add_trace(go.Scatter(x=dates, y=pct[low], line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=dates, y=pct[high], line=dict(width=0), fill="tonexty", fillcolor=color, name=f"{low}-{high}"))
+    fig.add_trace(go.Scatter(x=dates, y=pct["P50"], line=dict(color="#2E8B57", width=3), name="Median"))
+    if target > 0:
+        fig.add_hline(y=target, line_dash="dash", line_color="#EF553B", annotation_text="Target")
+    fig.update_layout(yaxis_title="Net worth (฿)", hovermode="x unified", margin=dict(t=30))
+    st.plotly_chart(fig, use_container_width=True)
+
+# ===========================
+# MAIN APP
+# ===========================
+@perf.instrument
+def show():
+    st.title("🔮 Wealth Projection")
+    st.caption("Monte Carlo: จำลองมูลค่าพอร์ตในอนาคตจากผลตอบแทน/ความผันผวนของแต่ละชั้นใน pyramid + เงินเติมรายเดือน")
+    st.markdown("---")
+
+    _, total_value, _ = Overview.build_asset_items(Overview.load_data())
+    assumptions, corr = load_assumptions()
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        years = st.slider("Years", 1, 40, 20)
+    with c2:
+        monthly = st.number_input("Monthly contribution (฿)", min_value=0, value=10_000, step=1_000)
+    with c3:
+        target = st.number_input("Target (฿)", min_value=0, value=int(round(total_value * 3, -5)), step=100_000)
+    with c4:
+        n_paths = st.select_slider("Paths", options=PATH_OPTIONS, value=10_000)
+
+    # สมมติฐานแต่ละชั้น (แก้ได้) ค่าเริ่มต้นมาจากประวัติพอร์ต
+    with st.expander("⚙️ Assumptions per pyramid layer", expanded=False):
+        edited = st.data_editor(
+            assumptions,
+            disabled=["Layer", "Value", "Source"],
+            column_config={
+                "Return (%)": st.column_config.NumberColumn(format="%.1f", help="ผลตอบแทนเฉลี่ยต่อปี (log)"),
+                "Volatility (%)": st.column_config.NumberColumn(format="%.1f", min_value=0.0),
+                "Target (%)": st.column_config.NumberColumn(format="%.0f", min_value=0.0, help="สัดส่วนของเงินเติมที่ลงชั้นนี้"),
+                "Value": st.column_config.NumberColumn(format="%.0f"),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    # เริ่มจากยอดรวมหน้า Overview แบ่งตามมูลค่าจริงของแต่ละชั้น / เงินเติมแบ่งตาม Target(%)
+    value = edited['Value'].fillna(0).to_numpy(dtype=float)
+    weights = edited['Target (%)'].fillna(0).to_numpy(dtype=float)
+    weights = weights / weights.sum() if weights.sum() > 0 else np.full(len(weights), 1 / len(weights))
+    start = total_value * (value / value.sum() if value.sum() > 0 else weights)
+
+    result = projection.project(
+        tuple(start), tuple(monthly * weights),
+        tuple(edited['Return (%)'].to_numpy(dtype=float) / 100),
+        tuple(edited['Volatility (%)'].to_numpy(dtype=float) / 100),
+        tuple(map(tuple, corr)), years, n_paths=n_paths, target=float(target) if target > 0 else np.inf,
+    )
+
+    final = result['final']
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Start", f"฿ {total_value:,.0f}")
+    m2.metric(f"Median in {years}y", f"฿ {np.median(final):,.0f}")
+    m3.metric("Bad case (P5)", f"฿ {np.percentile(final, 5):,.0f}")
+    m4.metric("Chance to reach target", f"{result['p_target'].iloc[-1] * 100:.1f}%" if target > 0 else "-")
+
+    st.subheader("📈 Projected net worth")
+    display_fan_chart(result, target)
+
+    if target > 0:
+        st.subheader("🎯 Probability of reaching target")
+        p_target = result['p_target'] * 100
+        p_target.index = p_target.index / 12
+        p_target.index.name = "Years"
+        st.area_chart(p_target.rename("Probability (%)"), color="#2E8B57")
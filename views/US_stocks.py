@@ -1,37 +1,47 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import yfinance as yf
-from streamlit_gsheets import GSheetsConnection  
 from datetime import timedelta
 import datetime
 import utils
+import storage
+import schema
+import returns
+import chart_cache
+from views import risk
+from views import zoom
+import perf
 
 # st.set_page_config(page_title="Wealth Command Center", layout="wide")
 
 # ===========================
 # DATA 
 # ===========================
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["us_stocks"], shared=True)
 def load_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="rebalance", skiprows=14)
+    df = schema.apply("us_stocks", storage.read("us_stocks"))
     df=df[~df['US stock'].str.lower().str.contains('total')]
-    return df
+    df['US stock']=df['US stock'].cat.remove_unused_categories()
+    return schema.freeze(df)
+
+@perf.cache_data(ttl=600, tables=["portfolio_hx"], shared=True)
+def load_history_data():
+    return schema.load("portfolio_hx")
+
+@perf.cache_data(ttl=600, tables=["transactions"], shared=True)
+def load_ledger():
+    # ทั้งซื้อและขาย: กระแสเงินสดของ TWR / XIRR
+    return schema.load("transactions")
 
 # sp500
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["transactions"], shared=True)
 def load_transaction_history():
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        df=conn.read(worksheet='Buying track',skiprows=6)
-        df['Date']=pd.to_datetime(df['Date'],format='%d/%m/%Y')
+        df=schema.apply("transactions", storage.read("transactions"))
         df=df[df['Buy/Sell']=='Buy']
         df=df[df['Net Value (THB)']!=0]
         df = df.sort_values('Date')
-        return df
+        return schema.freeze(df)
     except Exception as e:
         st.error(f'Error loading transaction : {e}')
         return None
@@ -44,7 +54,7 @@ def handle_update(rebalance_df):
 
         new_hx_df=utils.update_portfolio_hx(
             current_value, current_cost, transactions,
-            hx_sheet='Portfolio_Hx',benchmark_ticker='SPY'
+            hx_table='portfolio_hx',benchmark_ticker=list(utils.BENCHMARKS),incremental=True
         )
         return new_hx_df
     
@@ -62,7 +72,7 @@ def display_metrics_filter(df):
     with col2:
         types = ['All']+df['Type'].unique().tolist()    
         selected_type = st.selectbox("Type", types,label_visibility="collapsed")
-        filtered_df = df.copy()
+        filtered_df = df
         if selected_type !='All':
             filtered_df=filtered_df[filtered_df['Type']==selected_type]
     
@@ -114,7 +124,16 @@ def display_sort(df):
     
     return df
 
+# fragment: เปลี่ยน sort / คอลัมน์ -> rerun แค่ตาราง ไม่วาดกราฟใหม่
+@st.fragment
+def display_sort_table(df):
+    sort_df = display_sort(df)
+    display_table(sort_df)
+
 def display_graph(df):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     # make fx show graph
     def create_piechart(df):
         fig=px.pie(df, values='Portion',names='US stock',title='🍰 Stock Allocation',hole=0.4)
@@ -139,38 +158,89 @@ def display_graph(df):
     # display graph
     st.subheader("🧠 Analytics")
     col1,col2=st.columns(2)
+    # Figure เดิมใช้ซ้ำได้ทุก rerun / ทุก session จนกว่าคอลัมน์ที่กราฟใช้จะเปลี่ยน
     with col1:
-        piechart=create_piechart(df)
+        piechart=chart_cache.plotly_figure(
+            "us_stocks.piechart", [df[['US stock','Portion']]], lambda: create_piechart(df)
+        )
         st.plotly_chart(piechart, use_container_width=True)
     with col2:
-        type_fig=create_comparechart(df)
+        type_fig=chart_cache.plotly_figure(
+            "us_stocks.comparechart", [df[['Type','Value','Invest','Profit/loss']]], lambda: create_comparechart(df)
+        )
         st.plotly_chart(type_fig, use_container_width=True)
 #sp500
-def display_Hxchart(rebalance_df):
+# fragment: ปุ่ม update / เลือก benchmark -> rerun แค่กราฟนี้ (อ่าน Portfolio_Hx ผ่าน cache)
+@st.fragment
+def display_Hxchart():
     def display_Hxchart(hx_df):
-        st.subheader("📈 My Portfolio vs S&P 500")
+        import plotly.express as px
+
+        st.subheader("📈 My Portfolio vs Benchmarks")
         if len(hx_df)<2:
             st.info("⏳ รอสะสมข้อมูลอีกสัก 1-2 วัน กราฟจะเริ่มวาดเส้นให้เห็นครับ")
             return 
-        plot_df=hx_df.copy()
+        # thaw: เพิ่มคอลัมน์ % ได้โดยไม่แตะ frame ที่ cache แชร์ไว้ (ไม่คัดลอกทั้งตาราง)
+        plot_df=schema.thaw(hx_df)
         plot_df['Date']=pd.to_datetime(plot_df['Date'])
 
-        myport_1=plot_df['My_Stock_Value'].iloc[0]
-        sp500_1=plot_df['Strategy_SP500_Value'].iloc[0]
+        # เลือก benchmark ที่จะโชว์ (เฉพาะตัวที่มีคอลัมน์ใน Portfolio_Hx แล้ว)
+        available=[t for t in utils.BENCHMARKS if utils.benchmark_columns(t)[0] in plot_df.columns]
+        selected=st.multiselect(
+            "Benchmarks",
+            options=available,
+            default=available[:1],
+            format_func=lambda t: utils.BENCHMARKS[t]
+        )
+
         cost_1=plot_df['My_Stock_Cost'].iloc[0]
 
-        plot_df['myport_%']=((plot_df['My_Stock_Value']-myport_1)/myport_1)*100
-        plot_df['sp500_%']=((plot_df['Strategy_SP500_Value']-sp500_1)/sp500_1)*100
+        # พอร์ตและ benchmark ใช้ TWR (ไม่นับเงินที่เติมเข้าไปเป็นกำไร) ต้นทุนยังเป็น % การเพิ่มขึ้นแบบเดิม
+        perf_data=returns.performance(plot_df, load_ledger())
+        twr=perf_data['twr'].reindex(plot_df['Date'])
+        plot_df['myport_%']=twr['Stock'].to_numpy() if 'Stock' in twr else float('nan')
         plot_df['cost_%']=((plot_df['My_Stock_Cost']-cost_1)/cost_1)*100
+        color_map={'myport_%': '#00CC96', "cost_%" : "#4B4949" }
+
+        palette=['#EF553B', '#636EFA', '#AB63FA', '#FFA15A', '#19D3F3']
+        lines=['myport_%']
+        for i, ticker in enumerate(selected):
+            label=utils.BENCHMARKS[ticker]
+            line=f'{label} %'
+            plot_df[line]=twr[label].to_numpy() if label in twr else float('nan')
+            color_map[line]=palette[i % len(palette)]
+            lines.append(line)
+        lines.append('cost_%')
+
+        # ประวัติรายวันหลายปี: ส่งไปวาดไม่เกิน ~MAX_POINTS จุดต่อเส้น (เลือกช่วงสั้นลง = เห็นทุกจุด)
+        plot_df=zoom.zoom(plot_df, key="us_hx", x='Date', columns=lines)
 
-        fig=px.line(plot_df,
-            x='Date',
-            y=['myport_%','sp500_%', 'cost_%'],
-            color_discrete_map={'myport_%': '#00CC96','sp500_%': '#EF553B', "cost_%" : "#4B4949" }              
+        def create_linechart():
+            fig=px.line(plot_df,
+                x='Date',
+                y=lines,
+                color_discrete_map=color_map
+            )
+            fig.add_hline(y=0, line_dash="dash", line_color="gray")
+            return fig
+
+        fig=chart_cache.plotly_figure(
+            "us_stocks.hxchart", [plot_df[['Date']+lines]], create_linechart, params=tuple(color_map.items())
         )
-        fig.add_hline(y=0, line_dash="dash", line_color="gray")
         st.plotly_chart(fig, use_container_width=True)
 
+        summary=perf_data['summary']
+        st.caption("TWR = ผลตอบแทนที่หักผลของเงินเติม (เทียบกับ benchmark ได้ตรง) / XIRR = ผลตอบแทนต่อปีของเงินที่ลงจริง")
+        st.dataframe(
+            summary[summary['Series'].isin(['Stock']+[utils.BENCHMARKS[t] for t in selected])],
+            column_config={
+                c: st.column_config.NumberColumn(format="%.2f%%")
+                for c in ['TWR (%)', 'TWR p.a. (%)', 'XIRR (%)', 'Simple (%)']
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
     #display
     col1,col2=st.columns([3,1])
     with col1:
@@ -178,33 +248,41 @@ def display_Hxchart(rebalance_df):
     with col2:
         update_btn=st.button("💾 Update Data",type='primary',use_container_width=True)
     if update_btn:
-        new_hx_df=handle_update(rebalance_df)
+        # ใช้ยอดรวมทั้งพอร์ต (ไม่ขึ้นกับ filter Type ด้านบน)
+        # storage.upsert ล้าง cache ของ load_history_data ให้แล้ว
+        new_hx_df=handle_update(load_data())
         display_Hxchart(new_hx_df)
     else:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        hx_df= conn.read(worksheet='Portfolio_Hx')
+        hx_df= load_history_data()
         display_Hxchart(hx_df)
 # ===========================
 # MAIN APP
 # ===========================
-def show():
-    st.title("US stock")
-    st.markdown("---")
-    
+# fragment: เปลี่ยน Type -> rerun เฉพาะส่วนนี้ (ไม่อ่าน Portfolio_Hx ใหม่)
+@st.fragment
+def display_portfolio():
     df = load_data()
 
     df=display_metrics_filter(df)
     st.markdown("---")
 
-    sort_df = display_sort(df)
-    display_table(sort_df)
+    display_sort_table(df)
     st.markdown("---")
 
     display_graph(df)
+
+@perf.instrument
+def show():
+    st.title("US stock")
     st.markdown("---")
     
-    display_Hxchart(df)
-
-
-
+    display_portfolio()
+    st.markdown("---")
+    
+    display_Hxchart()
+    st.markdown("---")
 
+    try:
+        risk.show_risk(load_history_data(), load_ledger(), 'Stock', key="us_stocks")
+    except Exception as e:
+        st.warning(f"Risk error: {e}")
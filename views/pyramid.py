@@ -1,16 +1,19 @@
 import streamlit as st
 import pandas as pd
-from streamlit_gsheets import GSheetsConnection
+import schema
+import rebalance
+import perf
 # -------------------------------------------------------
 # LOAD DATA
 # -------------------------------------------------------
-@st.cache_data(ttl=600)
+@perf.cache_data(ttl=600, tables=["pyramid"], shared=True)
 def load_pyramid_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="rebalance", skiprows=1)
-    df = df.iloc[:3, 11:19]
-    df.columns = ['Pyramid', 'Asset', 'Invest', 'Value', 'GainLoss', 'Portion (%)', 'Target(%)']
-    return df
+    return schema.load("pyramid")
+
+@perf.cache_data(ttl=600, tables=["assets", "pyramid"], shared=True)
+def load_holdings():
+    # สินทรัพย์ใน rebalance ที่อยู่ในชั้นของ pyramid (Asset, Layer, Value)
+    return rebalance.map_layers(schema.load("assets"), load_pyramid_data())
 
 # -------------------------------------------------------
 # 🎨 PYRAMID CONFIGURATION
@@ -82,10 +85,9 @@ def render_pyramid_from_db(df):
             r = row.iloc[0]
             assets_str = str(r['Asset']) if pd.notnull(r['Asset']) else "-"
             if len(assets_str) > 40: assets_str = assets_str[:40] + "..."
+            # schema แปลงเป็นหน่วย % ให้แล้ว (ไม่ต้องเดาว่าเป็น 0-1 หรือ 0-100)
             actual_pct = r['Portion (%)'] if pd.notnull(r['Portion (%)']) else 0
             target_pct = r['Target(%)'] if pd.notnull(r['Target(%)']) else 0
-            if actual_pct < 1.05: actual_pct *= 100
-            if target_pct < 1.05: target_pct *= 100
         else:
             assets_str = "No Assets"; actual_pct = 0; target_pct = 0
 
@@ -117,11 +119,61 @@ def render_pyramid_from_db(df):
     return html_content
 
 # -------------------------------------------------------
-# 🚀 เรียกใช้งาน (ตัวอย่าง)
+# ⚖️ REBALANCE PLANNER
 # -------------------------------------------------------
-allocation_df=load_pyramid_data()
+# fragment: ลาก slider / เปลี่ยนโหมด -> คำนวณและวาดเฉพาะส่วนนี้
+@st.fragment
+def show_planner(allocation_df):
+    holdings = load_holdings()
+    if holdings.empty:
+        st.info("ไม่พบสินทรัพย์ที่ตรงกับคอลัมน์ Asset ของ pyramid")
+        return
+
+    c1, c2 = st.columns(2)
+    with c1:
+        cash = st.slider("New cash (฿)", 0, 500_000, 0, step=5_000)
+    with c2:
+        tolerance = st.slider("Tolerance (± %)", 0.0, 10.0, 5.0, step=0.5)
+    new_cash_only = st.toggle("New cash only (no selling)", value=False)
+
+    targets = dict(zip(allocation_df['Pyramid'].astype(str), allocation_df['Target(%)'].fillna(0)))
+    trades, layers, in_band = rebalance.plan(holdings, targets, tolerance / 100, cash, new_cash_only)
+
+    if in_band:
+        st.success("✅ ทุกชั้นอยู่ในช่วงเป้าหมายหลังปรับ")
+    else:
+        st.warning("⚠️ ยังเข้าช่วงไม่ได้ทุกชั้น (เงินใหม่ไม่พอ ถ้าไม่ขาย) ลองเพิ่มเงินหรือปิดโหมด new cash only")
 
+    st.dataframe(
+        layers,
+        column_config={
+            "Actual (%)": st.column_config.NumberColumn(format="%.1f%%"),
+            "Target (%)": st.column_config.NumberColumn(format="%.0f%%"),
+            "After (%)": st.column_config.NumberColumn(format="%.1f%%"),
+            "Trade": st.column_config.NumberColumn("Trade (฿)", format="%+,.0f"),
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    # เฉพาะรายการที่ต้องซื้อ/ขายจริง (ไม่ถึง 1 บาทไม่นับ)
+    orders = trades[trades['Trade'].abs() >= 1].assign(Action=lambda d: d['Trade'].map(lambda x: "Buy" if x > 0 else "Sell"))
+    st.dataframe(
+        orders[['Action', 'Asset', 'Layer', 'Value', 'Trade', 'After']],
+        column_config={
+            "Value": st.column_config.NumberColumn(format="฿ %,.0f"),
+            "Trade": st.column_config.NumberColumn("Trade (฿)", format="%+,.0f"),
+            "After": st.column_config.NumberColumn(format="฿ %,.0f"),
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+# -------------------------------------------------------
+# 🚀 เรียกใช้งาน (ตัวอย่าง)
+# -------------------------------------------------------
+@perf.instrument
 def show_pyramid():
+    allocation_df=load_pyramid_data() # โหลดตอนเปิดดูจริง ไม่ใช่ตอน import
     st.markdown("### 🏛️ Portfolio Pyramid Structure")
     # เรียกฟังก์ชัน Render
     html = render_pyramid_from_db(allocation_df)
@@ -138,4 +190,7 @@ def show_pyramid():
             },
             hide_index=True,
             use_container_width=True
-        )
\ No newline at end of file
+        )
+
+    with st.expander("⚖️ Rebalance planner"):
+        show_planner(allocation_df)
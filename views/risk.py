@@ -0,0 +1,65 @@
+import streamlit as st
+import pandas as pd
+from datetime import timedelta
+import price_cache
+import risk
+import utils
+import perf
+from views import zoom
+
+# -------------------------------------------------------
+# LOAD DATA
+# -------------------------------------------------------
+@perf.cache_data(ttl=600)
+def load_benchmark_prices(tickers, start):
+    # ราคาปิดจาก price_cache (โหลดเน็ตเฉพาะช่วงที่ยังไม่มีในเครื่อง)
+    return price_cache.get_close_prices(list(tickers), start)
+
+# -------------------------------------------------------
+# 🛡️ RISK SECTION (ใช้ทั้งหน้า Overview และ US stocks)
+# -------------------------------------------------------
+# fragment: เปลี่ยนหน้าต่าง / benchmark -> rerun แค่ส่วนนี้
+@st.fragment
+def show_risk(hx_df, trans, series, key):
+    """
+    series = ชื่อซีรีส์ใน returns.SERIES ('Stock' / 'Fund' / 'Total') ที่จะวัดความเสี่ยง
+    key = prefix ของ widget (หน้าไหนเรียกก็ได้ไม่ชนกัน)
+    """
+    st.subheader("🛡️ Risk")
+    if hx_df.empty or len(hx_df) < 3:
+        st.info("⏳ ต้องมีประวัติพอร์ตอย่างน้อย 3 วันก่อนถึงจะคำนวณความเสี่ยงได้ครับ")
+        return
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        window = st.radio("Window", list(risk.WINDOWS), index=2, horizontal=True, key=f"{key}_risk_window")
+    with c2:
+        ticker = st.selectbox(
+            "Benchmark",
+            options=list(utils.BENCHMARKS),
+            format_func=lambda t: utils.BENCHMARKS[t],
+            key=f"{key}_risk_benchmark"
+        )
+    with c3:
+        metric = st.selectbox("Rolling metric", risk.METRICS, key=f"{key}_risk_metric")
+
+    start = pd.Timestamp(hx_df['Date'].min()) - timedelta(days=utils.PRICE_LOOKBACK_DAYS)
+    prices = load_benchmark_prices((ticker,), start)
+    result = risk.analyze(hx_df, trans, prices, series=series, ticker=ticker, window=window)
+    if not result['summary']:
+        st.info("ยังไม่มีข้อมูลพอสำหรับซีรีส์นี้")
+        return
+
+    # ค่าของทั้งช่วง
+    summary = result['summary']
+    cols = st.columns(len(risk.METRICS))
+    for col, name in zip(cols, risk.METRICS):
+        value = summary[name]
+        col.metric(name, "-" if pd.isna(value) else (f"{value:.1f}%" if "%" in name else f"{value:.2f}"))
+
+    # ค่า rolling ตามหน้าต่างที่เลือก (ทีละตัว: กราฟหลายเส้นยาวหลายปีวาดช้า)
+    st.caption(f"Rolling {window} {metric} (เทียบกับ {utils.BENCHMARKS[ticker]})")
+    st.line_chart(zoom.zoom(result['rolling'][[metric]].dropna(), key=f"{key}_risk_rolling"), color="#636EFA")
+
+    st.caption("Drawdown (% ต่ำกว่าจุดสูงสุดเดิม)")
+    st.area_chart(zoom.zoom(result['drawdown'].to_frame('Drawdown (%)'), key=f"{key}_risk_drawdown"), color="#EF553B")
@@ -0,0 +1,28 @@
+import streamlit as st
+import pandas as pd
+import downsample
+
+# -------------------------------------------------------
+# 🔍 ZOOM + DOWNSAMPLE (ใช้กับกราฟประวัติยาว ๆ ทุกหน้า)
+# -------------------------------------------------------
+# กราฟส่งไป browser ไม่เกิน ~downsample.MAX_POINTS จุดต่อเส้น
+# ข้อมูลยาวกว่านั้นมีแถบเลือกช่วงเวลา: ช่วงแคบลงจนจุดไม่เกินเพดาน = เห็นทุกจุด (ความละเอียดเต็ม)
+def zoom(df, key, x=None, columns=None, n=downsample.MAX_POINTS, method="lttb"):
+    """
+    df เรียงตามเวลาแล้ว (x = คอลัมน์วันที่ / None = index เป็นวันที่)
+    คืน df ช่วงที่เลือก ลดจุดเหลือไม่เกิน ~n จุดต่อเส้น (ข้อมูลไม่เกิน n แถว: คืน df เดิมไม่มีแถบเลือก)
+    """
+    if len(df) <= n:
+        return df
+    dates = pd.DatetimeIndex(df.index if x is None else df[x])
+    first, last = dates.min().date(), dates.max().date()
+    start, end = st.slider(
+        "ช่วงเวลา", min_value=first, max_value=last, value=(first, last),
+        format="DD/MM/YYYY", key=f"{key}_zoom", label_visibility="collapsed"
+    )
+    in_range = (dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end) + pd.Timedelta(days=1))
+    view = df[in_range]
+    shown = downsample.select(view, columns=columns, x=x, n=n, method=method)
+    if len(shown) < len(view):
+        st.caption(f"แสดง {len(shown):,} จาก {len(view):,} จุด (เลือกช่วงให้สั้นลงเพื่อดูทุกจุด)")
+    return shown